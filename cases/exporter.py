@@ -0,0 +1,58 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CASE_EXPORT_FIELDS = [
+    'id', 'loan_account_number', 'borrower_name', 'location', 'outstanding_amount',
+    'visit_status', 'last_visit_date', 'last_visit_remarks', 'ptp', 'next_action',
+    'priority', 'assigned_to', 'created_date',
+]
+VISIT_EXPORT_FIELDS = [
+    'id', 'case_id', 'case__loan_account_number', 'date', 'time', 'purpose', 'status',
+    'borrower_met', 'visited_whom', 'remarks', 'payment_status', 'amount_collected',
+    'interaction_remarks', 'ptp_date', 'ptp_reason', 'selfie',
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line straight back to the caller"""
+    def write(self, value):
+        return value
+
+
+def column_names(fields):
+    return [field.replace('__', '_') for field in fields]
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow(column_names(fields))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows, fields):
+    names = column_names(fields)
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def export_response(queryset, fields, output, filename):
+    """
+    Stream a queryset as CSV or NDJSON without materialising it.
+
+    Rows are read as tuples through a chunked server-side cursor, so memory
+    stays flat no matter how many rows match.
+    """
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    lines = iter_csv(rows, fields) if output == 'csv' else iter_ndjson(rows, fields)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -0,0 +1,140 @@
+import csv
+import datetime
+import io
+from collections import defaultdict
+from itertools import islice
+from django.db import transaction
+from .models import Case
+from .serializers import CaseImportSerializer
+from .signals import hand_over
+
+NATURAL_KEY = 'loan_account_number'
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "processed": self.processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def iter_csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.DictReader(text)
+    finally:
+        # Hand the underlying file back to its owner instead of closing it
+        text.detach()
+
+
+def iter_xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX import requires the openpyxl package")
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, [])]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Lazily yield one dict per data row of a CSV or XLSX allocation file"""
+    if filename.lower().endswith('.xlsx'):
+        return iter_xlsx_rows(fileobj)
+    if filename.lower().endswith('.csv'):
+        return iter_csv_rows(fileobj)
+    raise ValueError("Unsupported file type, expected .csv or .xlsx")
+
+
+def clean_row(row):
+    cleaned = {}
+    for key, value in row.items():
+        if not key:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if isinstance(value, datetime.datetime):
+            value = value.date()
+        # Blank spreadsheet cells mean "no value", not an empty string
+        cleaned[key.strip()] = None if value == '' else value
+    return cleaned
+
+
+def hand_over_reassigned(cases):
+    """bulk_create sends no signals, so cases the file moves to another agent are handed over here"""
+    owners = {getattr(case, NATURAL_KEY): case.assigned_to for case in cases}
+    moved = defaultdict(list)
+    existing = Case.objects.filter(**{f'{NATURAL_KEY}__in': list(owners)}).values_list(NATURAL_KEY, 'pk', 'assigned_to')
+    for key, pk, owner in existing:
+        if owner != owners[key]:
+            moved[owner].append(pk)
+    for owner, case_ids in moved.items():
+        hand_over(owner, case_ids)
+
+
+def upsert_cases(cases):
+    update_fields = [
+        field.name for field in Case._meta.concrete_fields
+        if field.name not in ('id', 'created_date', NATURAL_KEY)
+    ]
+    with transaction.atomic():
+        hand_over_reassigned(cases)
+        Case.objects.bulk_create(
+            cases,
+            update_conflicts=True,
+            unique_fields=[NATURAL_KEY],
+            update_fields=update_fields,
+        )
+
+
+def import_cases(rows, batch_size=DEFAULT_BATCH_SIZE, on_progress=None):
+    """
+    Validate and upsert case rows in chunks keyed on the loan account number.
+
+    Rows are consumed lazily, so only one batch is held in memory at a time.
+    Each batch is written in its own transaction; a row repeated within a batch
+    keeps its last occurrence.
+    """
+    result = ImportResult()
+    rows = enumerate(rows, start=2)  # row 1 is the header
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        valid = {}
+        for row_number, row in batch:
+            serializer = CaseImportSerializer(data=clean_row(row))
+            if serializer.is_valid():
+                valid[serializer.validated_data[NATURAL_KEY]] = Case(**serializer.validated_data)
+            else:
+                result.add_error(row_number, serializer.errors)
+        if valid:
+            upsert_cases(list(valid.values()))
+        result.processed += len(batch)
+        result.imported += len(valid)
+        if on_progress:
+            on_progress(result)
+    return result
@@ -0,0 +1,30 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from cases.importer import DEFAULT_BATCH_SIZE, import_cases, iter_rows
+
+
+class Command(BaseCommand):
+    """Django command to stream a lender allocation file into the Case table"""
+
+    help = "Import cases from a CSV or XLSX allocation file, upserting on loan_account_number."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--errors', help='Write per-row errors to this JSON file.')
+
+    def handle(self, *args, **options):
+        def report(result):
+            self.stdout.write(f"Processed {result.processed} rows, imported {result.imported}, failed {result.failed}")
+
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = import_cases(iter_rows(fileobj, options['path']), options['batch_size'], report)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if options['errors']:
+            with open(options['errors'], 'w') as fileobj:
+                json.dump(result.errors, fileobj, indent=2)
+        style = self.style.WARNING if result.failed else self.style.SUCCESS
+        self.stdout.write(style(f"Done: {result.imported} imported, {result.failed} failed"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from cases.models import Visit
+from cases.renditions import process_visit_selfie
+
+
+class Command(BaseCommand):
+    """Django command to build missing or outdated selfie renditions"""
+
+    help = "Build thumbnail and display renditions for visit selfies that do not have current ones."
+
+    def handle(self, *args, **options):
+        pending = (
+            Visit.objects.exclude(selfie='').exclude(selfie__isnull=True)
+            .exclude(selfie_rendered_from=F('selfie'))
+            .values_list('id', flat=True)
+        )
+        processed = 0
+        for visit_id in pending.iterator(chunk_size=500):
+            process_visit_selfie(visit_id)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Rendered selfies for {processed} visit(s)"))
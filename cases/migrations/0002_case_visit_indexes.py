@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['assigned_to', 'visit_status'], name='case_assigned_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['assigned_to', 'priority'], name='case_assigned_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['visit_status', 'priority'], name='case_status_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['case', '-date', '-time'], name='visit_case_date_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0002_case_visit_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='loan_account_number',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
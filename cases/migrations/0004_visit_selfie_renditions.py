@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0003_case_loan_account_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visit',
+            name='selfie_display',
+            field=models.ImageField(blank=True, null=True, upload_to='visit_selfies/renditions/'),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='selfie_rendered_from',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='selfie_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='visit_selfies/renditions/'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_visit_selfie_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='visit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
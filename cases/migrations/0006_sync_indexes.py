@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['assigned_to', 'updated_at'], name='case_assigned_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visit',
+            index=models.Index(fields=['case', 'updated_at'], name='visit_case_updated_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 # Create your models here.
 
 class Case(models.Model):
+    # Lender's account reference; the natural key used when importing allocation files
+    loan_account_number = models.CharField(max_length=64, unique=True, null=True, blank=True)
     borrower_name = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
     outstanding_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -14,6 +16,16 @@ class Case(models.Model):
     priority = models.CharField(max_length=50)
     assigned_to = models.CharField(max_length=255)
     created_date = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['assigned_to', 'visit_status'], name='case_assigned_status_idx'),
+            models.Index(fields=['assigned_to', 'priority'], name='case_assigned_priority_idx'),
+            models.Index(fields=['visit_status', 'priority'], name='case_status_priority_idx'),
+            # Delta sync: an agent's cases changed since a token
+            models.Index(fields=['assigned_to', 'updated_at'], name='case_assigned_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.borrower_name} - {self.visit_status}"
@@ -33,6 +45,18 @@ class Visit(models.Model):
     ptp_date = models.DateField(null=True, blank=True)
     ptp_reason = models.TextField(blank=True)
     selfie = models.ImageField(upload_to='visit_selfies/', null=True, blank=True)
+    # Resized, EXIF-free renditions built in the background (see cases/renditions.py)
+    selfie_thumbnail = models.ImageField(upload_to='visit_selfies/renditions/', null=True, blank=True)
+    selfie_display = models.ImageField(upload_to='visit_selfies/renditions/', null=True, blank=True)
+    selfie_rendered_from = models.CharField(max_length=100, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['case', '-date', '-time'], name='visit_case_date_idx'),
+            # Delta sync, per case of the agent
+            models.Index(fields=['case', 'updated_at'], name='visit_case_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Visit for {self.case.borrower_name} on {self.date}"
@@ -0,0 +1,84 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from .models import Visit
+
+logger = logging.getLogger(__name__)
+
+# (field, longest edge in pixels, Pillow format, extension, save options)
+RENDITIONS = [
+    ('selfie_thumbnail', 320, 'WEBP', 'webp', {'quality': 75, 'method': 4}),
+    ('selfie_display', 1280, 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'VISIT_SELFIE_RENDITION_WORKERS', 2),
+            thread_name_prefix='selfie-renditions',
+        )
+    return _executor
+
+
+def render(image, max_edge, image_format, options):
+    """Resize an image and encode it without any of the source metadata"""
+    rendition = image.copy()
+    rendition.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    buffer = BytesIO()
+    # No exif/icc arguments are passed, so GPS and device data are dropped
+    rendition.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def process_visit_selfie(visit_id):
+    """Build the selfie renditions for one visit and record their paths"""
+    visit = Visit.objects.only('id', 'selfie').filter(pk=visit_id).first()
+    if visit is None or not visit.selfie:
+        return
+    source_name = visit.selfie.name
+    with visit.selfie.open('rb') as source:
+        image = Image.open(source)
+        # Phones store rotation in EXIF; apply it before the tag is dropped
+        image = ImageOps.exif_transpose(image).convert('RGB')
+
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    paths = {}
+    for field, max_edge, image_format, extension, options in RENDITIONS:
+        storage = Visit._meta.get_field(field).storage
+        name = f'visit_selfies/renditions/{stem}_{max_edge}.{extension}'
+        paths[field] = storage.save(name, ContentFile(render(image, max_edge, image_format, options)))
+
+    # Only record the renditions if the selfie was not replaced meanwhile
+    Visit.objects.filter(pk=visit_id, selfie=source_name).update(
+        selfie_rendered_from=source_name, updated_at=timezone.now(), **paths
+    )
+
+
+def run_in_background(visit_id):
+    try:
+        process_visit_selfie(visit_id)
+    except Exception:
+        logger.exception(f"Could not build selfie renditions for visit {visit_id}")
+    finally:
+        # Worker threads hold their own connections; don't leave them open between jobs
+        connections.close_all()
+
+
+def schedule_selfie_renditions(visit):
+    """Queue rendition work for a visit once the transaction that saved it commits"""
+    if not visit.selfie or visit.selfie.name == visit.selfie_rendered_from:
+        return
+    if getattr(settings, 'VISIT_SELFIE_RENDITION_WORKERS', 2) == 0:
+        transaction.on_commit(lambda: process_visit_selfie(visit.pk))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_in_background, visit.pk))
@@ -1,12 +1,21 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsetMixin
 from .models import Case, Visit
 
-class CaseSerializer(serializers.ModelSerializer):
+class CaseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Case
         fields = '__all__'
 
-class VisitSerializer(serializers.ModelSerializer):
+class VisitSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Visit
-        fields = '__all__' 
\ No newline at end of file
+        exclude = ['selfie_rendered_from']
+        read_only_fields = ['selfie_thumbnail', 'selfie_display']
+
+class CaseImportSerializer(CaseSerializer):
+    """Row validation for bulk imports; uniqueness is resolved by the upsert instead of a query per row"""
+    class Meta(CaseSerializer.Meta):
+        extra_kwargs = {
+            'loan_account_number': {'required': True, 'allow_null': False, 'validators': []},
+        }
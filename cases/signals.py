@@ -0,0 +1,66 @@
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from core.models import Tombstone
+from .models import Case, Visit
+from .renditions import schedule_selfie_renditions
+
+@receiver(post_save, sender=Visit)
+def build_selfie_renditions(sender, instance, **kwargs):
+    schedule_selfie_renditions(instance)
+
+# Cases and visits that leave an agent, deleted or reassigned, leave a
+# tombstone for the sync endpoint. A case's visits move with it.
+
+def case_owner(case_id):
+    return Case.objects.filter(pk=case_id).values_list('assigned_to', flat=True).first()
+
+def bury_cases(owner, case_ids):
+    """Tombstone cases and their visits for the agent who had them; returns the visits"""
+    visits = Visit.objects.filter(case_id__in=case_ids)
+    Tombstone.bury('case', owner, case_ids)
+    Tombstone.bury('visit', owner, list(visits.values_list('pk', flat=True)))
+    return visits
+
+def hand_over(owner, case_ids):
+    """Cases moved away from `owner`: bury them, and make their old visits new to whoever has them now"""
+    bury_cases(owner, case_ids).update(updated_at=timezone.now())
+
+@receiver(pre_save, sender=Case)
+def remember_previous_owner(sender, instance, update_fields=None, **kwargs):
+    instance._previous_owner = None
+    if instance.pk and (update_fields is None or 'assigned_to' in update_fields):
+        instance._previous_owner = case_owner(instance.pk)
+
+@receiver(post_save, sender=Case)
+def bury_reassigned_case(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_owner', None)
+    if previous and previous != instance.assigned_to:
+        hand_over(previous, [instance.pk])
+
+@receiver(pre_save, sender=Visit)
+def remember_previous_case(sender, instance, update_fields=None, **kwargs):
+    instance._previous_case_id = None
+    if instance.pk and (update_fields is None or 'case' in update_fields):
+        instance._previous_case_id = Visit.objects.filter(pk=instance.pk).values_list('case_id', flat=True).first()
+
+@receiver(post_save, sender=Visit)
+def bury_moved_visit(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_case_id', None)
+    if previous and previous != instance.case_id:
+        owner = case_owner(previous)
+        if owner != case_owner(instance.case_id):
+            Tombstone.bury('visit', owner, [instance.pk])
+
+@receiver(pre_delete, sender=Case)
+def bury_deleted_case(sender, instance, **kwargs):
+    bury_cases(instance.assigned_to, [instance.pk])
+
+@receiver(pre_delete, sender=Visit)
+def bury_deleted_visit(sender, instance, origin=None, **kwargs):
+    deleted_from = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if deleted_from is Case:
+        # Buried along with the case
+        return
+    Tombstone.bury('visit', case_owner(instance.case_id), [instance.pk])
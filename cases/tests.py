@@ -1,3 +1,260 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+from .importer import import_cases, iter_rows
+from .models import Case, Visit
 
-# Create your tests here.
+
+def make_case(**kwargs):
+    data = {
+        'borrower_name': 'Ravi Kumar',
+        'location': 'Pune',
+        'outstanding_amount': '15000.50',
+        'visit_status': 'pending',
+        'next_action': 'Visit',
+        'priority': 'high',
+        'assigned_to': 'agent1',
+    }
+    data.update(kwargs)
+    return Case.objects.create(**data)
+
+
+class CaseFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.case = make_case()
+        make_case(assigned_to='agent2', priority='low')
+
+    def test_filters_by_assignment_and_priority(self):
+        response = self.client.get(reverse('case-list'), {'assigned_to': 'agent1', 'priority': 'high'})
+        self.assertEqual([c['id'] for c in response.data], [self.case.id])
+
+    def test_visits_filter_by_case(self):
+        Visit.objects.create(case=self.case, date='2025-01-02', time='10:00', purpose='Collect', status='done')
+        Visit.objects.create(case=make_case(), date='2025-01-03', time='10:00', purpose='Collect', status='done')
+        response = self.client.get(reverse('visit-list'), {'case': self.case.id})
+        self.assertEqual(len(response.data), 1)
+
+    async def test_lists_are_served_asynchronously(self):
+        response = await self.async_client.get(reverse('case-list'), {'priority': 'low'})
+        self.assertEqual([c['assigned_to'] for c in response.json()], ['agent2'])
+
+    def test_create_still_goes_to_the_viewset(self):
+        data = {'borrower_name': 'Asha', 'location': 'Nagpur', 'outstanding_amount': '100.00',
+                'visit_status': 'pending', 'next_action': 'Call', 'priority': 'low', 'assigned_to': 'agent3'}
+        response = self.client.post(reverse('case-list'), data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Case.objects.filter(assigned_to='agent3').exists())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.case = make_case()
+        self.other = make_case(borrower_name='Asha')
+
+    def test_case_list_revalidates_until_a_case_changes(self):
+        url = reverse('case-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.client.patch(reverse('case-detail', args=[self.case.pk]), {'priority': 'low'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.other.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_case_detail_honours_if_modified_since(self):
+        url = reverse('case-detail', args=[self.case.pk])
+        response = self.client.get(url)
+        repeat = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(repeat.status_code, 304)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.case = make_case(last_visit_remarks='Long remarks ' * 100)
+        Visit.objects.create(case=self.case, date='2025-01-02', time='10:00', purpose='Collect', status='done')
+
+    def test_fields_narrow_output_and_select(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('case-list'), {'fields': 'id,borrower_name,priority'})
+        self.assertEqual(response.json(), [{'id': self.case.id, 'borrower_name': 'Ravi Kumar', 'priority': 'high'}])
+        self.assertNotIn('last_visit_remarks', queries.captured_queries[0]['sql'])
+
+        response = self.client.get(reverse('case-detail', args=[self.case.id]), {'fields': 'outstanding_amount'})
+        self.assertEqual(response.json(), {'outstanding_amount': '15000.50'})
+
+    def test_omit_drops_fields(self):
+        response = self.client.get(reverse('visit-list'), {'case': self.case.id, 'omit': 'remarks,selfie,selfie_display'})
+        visit = response.json()[0]
+        self.assertNotIn('remarks', visit)
+        self.assertNotIn('selfie', visit)
+        self.assertIn('selfie_thumbnail', visit)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('case-list'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExplainEndpointsCommandTests(TestCase):
+    def test_every_endpoint_is_index_backed(self):
+        out = StringIO()
+        call_command('explain_endpoints', '--strict', stdout=out)
+        self.assertIn('All endpoints are covered by indexes.', out.getvalue())
+
+
+IMPORT_HEADER = 'loan_account_number,borrower_name,location,outstanding_amount,visit_status,ptp,next_action,priority,assigned_to\n'
+
+
+class CaseImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('case-import-file')
+
+    def upload(self, content, name='allocation.csv'):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content)}, format='multipart')
+
+    def test_csv_upserts_on_loan_account_number(self):
+        make_case(loan_account_number='LN1', outstanding_amount='1.00')
+        content = (IMPORT_HEADER
+                   + 'LN1,Ravi Kumar,Pune,2500.00,pending,2025-02-01,Call,high,agent1\n'
+                   + 'LN2,Asha Rao,Delhi,900.10,pending,,Visit,low,agent2\n'
+                   + 'LN3,Bad Row,Delhi,not-a-number,pending,,Visit,low,agent2\n'
+                   + ',No Key,Delhi,10,pending,,Visit,low,agent2\n').encode()
+        response = self.upload(content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['processed'], 4)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual([e['row'] for e in response.data['errors']], [4, 5])
+        self.assertIn('outstanding_amount', response.data['errors'][0]['errors'])
+        self.assertEqual(Case.objects.count(), 2)
+        self.assertEqual(str(Case.objects.get(loan_account_number='LN1').outstanding_amount), '2500.00')
+
+    def test_batches_are_written_with_constant_queries(self):
+        rows = ''.join(f'LN{i},Borrower {i},Pune,{i}.50,pending,,Visit,high,agent1\n' for i in range(30))
+        with self.assertNumQueries(8):  # one savepoint, owner lookup, upsert and release per batch
+            result = import_cases(iter_rows(BytesIO((IMPORT_HEADER + rows).encode()), 'a.csv'), batch_size=15)
+        self.assertEqual(result.imported, 30)
+        self.assertEqual(Case.objects.count(), 30)
+
+    def test_xlsx_rows_are_imported(self):
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(IMPORT_HEADER.strip().split(','))
+        sheet.append(['LN9', 'Meena Iyer', 'Chennai', 1200.5, 'pending', None, 'Visit', 'medium', 'agent3'])
+        buffer = BytesIO()
+        workbook.save(buffer)
+        response = self.upload(buffer.getvalue(), 'allocation.xlsx')
+        self.assertEqual(response.data['imported'], 1)
+        self.assertEqual(Case.objects.get().borrower_name, 'Meena Iyer')
+
+    def test_rejects_unknown_file_types(self):
+        response = self.upload(b'{}', 'allocation.json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.case = make_case(loan_account_number='LN1')
+        make_case(loan_account_number='LN2', assigned_to='agent2')
+        Visit.objects.create(case=self.case, date='2025-01-02', time='10:30', purpose='Collect',
+                             status='done', amount_collected='500.00')
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_case_csv_respects_list_filters(self):
+        response = self.client.get(reverse('case-export'), {'assigned_to': 'agent1'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = self.read(response).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,loan_account_number,borrower_name'))
+        self.assertIn('LN1,Ravi Kumar,Pune,15000.50', lines[1])
+
+    def test_visit_ndjson_matches_api_formatting(self):
+        response = self.client.get(reverse('visit-export'), {'case': self.case.id, 'output': 'ndjson'})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        api = self.client.get(reverse('visit-list'), {'case': self.case.id}).json()[0]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['case_loan_account_number'], 'LN1')
+        for field in ('date', 'time', 'amount_collected', 'status'):
+            self.assertEqual(rows[0][field], api[field])
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get(reverse('case-export'), {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+def make_selfie(size=(2000, 1000), orientation=6):
+    image = Image.new('RGB', size, 'orange')
+    exif = Image.Exif()
+    exif[0x0112] = orientation  # rotate 90 degrees when displayed
+    exif[0x010F] = 'PhoneMaker'
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif, quality=95)
+    return SimpleUploadedFile('selfie.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class SelfieRenditionTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        overrides = override_settings(MEDIA_ROOT=self.tmp, VISIT_SELFIE_RENDITION_WORKERS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.case = make_case()
+
+    def create_visit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('visit-list'), {
+                'case': self.case.id, 'date': '2025-01-02', 'time': '10:00', 'purpose': 'Collect',
+                'status': 'done', 'selfie': make_selfie(),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.data)
+        return Visit.objects.get(pk=response.data['id'])
+
+    def test_renditions_are_resized_rotated_and_stripped(self):
+        visit = self.create_visit()
+        self.assertEqual(visit.selfie_rendered_from, visit.selfie.name)
+        with visit.selfie_thumbnail.open('rb') as thumbnail:
+            image = Image.open(thumbnail)
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (160, 320))
+            self.assertEqual(len(image.getexif()), 0)
+        with visit.selfie_display.open('rb') as display:
+            image = Image.open(display)
+            self.assertEqual((image.format, image.size), ('JPEG', (640, 1280)))
+            self.assertEqual(len(image.getexif()), 0)
+        self.assertLess(visit.selfie_thumbnail.size * 10, visit.selfie.size)
+
+    def test_serializer_exposes_thumbnail_url(self):
+        visit = self.create_visit()
+        data = self.client.get(reverse('visit-detail', args=[visit.id])).data
+        self.assertTrue(data['selfie_thumbnail'].endswith('.webp'))
+        self.assertNotIn('selfie_rendered_from', data)
+
+    def test_backfill_command_renders_missing_selfies(self):
+        visit = self.create_visit()
+        Visit.objects.filter(pk=visit.pk).update(selfie_thumbnail=None, selfie_display=None, selfie_rendered_from='')
+        out = StringIO()
+        call_command('render_visit_selfies', stdout=out)
+        self.assertIn('Rendered selfies for 1 visit(s)', out.getvalue())
+        self.assertTrue(Visit.objects.get(pk=visit.pk).selfie_thumbnail)
@@ -2,15 +2,49 @@ from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.parsers import MultiPartParser, FormParser
+from core.async_views import AsyncAPIView
+from core.conditional import ConditionalGetMixin, aaggregate_validators, list_etag, not_modified, set_validators
 from .models import Case, Visit
 from .serializers import CaseSerializer, VisitSerializer
+from .importer import import_cases, iter_rows
+from .exporter import CASE_EXPORT_FIELDS, CONTENT_TYPES, VISIT_EXPORT_FIELDS, export_response
+
+
+def case_queryset(params):
+    queryset = Case.objects.all()
+    for param in ('assigned_to', 'visit_status', 'priority'):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{param: value})
+    return queryset
+
+
+def visit_queryset(params):
+    queryset = Visit.objects.all()
+    case_id = params.get('case')
+    if case_id:
+        queryset = queryset.filter(case_id=case_id).order_by('-date', '-time')
+    return queryset
+
+
+def export_output(request):
+    output = request.query_params.get('output', 'csv')
+    return output if output in CONTENT_TYPES else None
 
 # Create your views here.
 
-class CaseViewSet(viewsets.ModelViewSet):
+class CaseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Case.objects.all()
     serializer_class = CaseSerializer
 
+    def get_queryset(self):
+        queryset = case_queryset(self.request.query_params)
+        if self.action in ('list', 'retrieve'):
+            queryset, _ = CaseSerializer.project(queryset, self.request.query_params)
+        return queryset
+
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         case = self.get_object()
@@ -18,10 +52,35 @@ class CaseViewSet(viewsets.ModelViewSet):
         case.save()
         return Response(CaseSerializer(case).data)
 
-class VisitViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def import_file(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "A 'file' upload is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = import_cases(iter_rows(upload.file, upload.name))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered case list as ?output=csv (default) or ?output=ndjson"""
+        output = export_output(request)
+        if output is None:
+            return Response({"error": "output must be one of: csv, ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(self.get_queryset(), CASE_EXPORT_FIELDS, output, 'cases')
+
+class VisitViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Visit.objects.all()
     serializer_class = VisitSerializer
 
+    def get_queryset(self):
+        queryset = visit_queryset(self.request.query_params)
+        if self.action in ('list', 'retrieve'):
+            queryset, _ = VisitSerializer.project(queryset, self.request.query_params)
+        return queryset
+
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         visit = self.get_object()
@@ -37,3 +96,41 @@ class VisitViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=400)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered visit list as ?output=csv (default) or ?output=ndjson"""
+        output = export_output(request)
+        if output is None:
+            return Response({"error": "output must be one of: csv, ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(self.get_queryset(), VISIT_EXPORT_FIELDS, output, 'visits')
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    Async GET for a list route; writes on the same URL stay with the viewset.
+    Subclasses set serializer_class and define get_queryset().
+    """
+    serializer_class = None
+
+    async def get(self, request):
+        queryset, _ = self.serializer_class.project(self.get_queryset(), request.query_params)
+        etag = list_etag(request, await aaggregate_validators(queryset))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        rows = [row async for row in queryset]
+        context = {'request': request, 'format': self.format_kwarg, 'view': self}
+        return set_validators(Response(self.serializer_class(rows, many=True, context=context).data), etag)
+
+class CaseListView(AsyncListView):
+    serializer_class = CaseSerializer
+
+    def get_queryset(self):
+        return case_queryset(self.request.query_params)
+
+class VisitListView(AsyncListView):
+    serializer_class = VisitSerializer
+
+    def get_queryset(self):
+        return visit_queryset(self.request.query_params)
@@ -0,0 +1,51 @@
+import inspect
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    An APIView whose handlers are coroutines.
+
+    DRF's own dispatch is synchronous, so authentication, permission and
+    throttle checks (which may touch the session table or the cache) are run
+    through sync_to_async, and the handler is awaited on the event loop.
+    Under ASGI a client waiting on the database then holds a coroutine rather
+    than a worker thread; under WSGI Django runs the view with async_to_sync.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def split_reads(read_view, write_view):
+    """
+    Route GET/HEAD to an async view and every other method to the sync view
+    serving the same URL, so a list endpoint can go async while create stays
+    on the viewset.
+    """
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await read_view(request, *args, **kwargs)
+        return await sync_to_async(write_view)(request, *args, **kwargs)
+    return csrf_exempt(view)
@@ -0,0 +1,7 @@
+"""
+Serializer and list endpoint benchmarks, run with `python manage.py benchmark`.
+
+datasets builds synthetic tasks, cases and visits; suite times serializing
+them and full request/response cycles, and writes JSON that can be diffed
+between commits.
+"""
@@ -0,0 +1,94 @@
+from datetime import time, timedelta
+from django.utils import timezone
+from cases.models import Case, Visit
+from users.models import Task, TaskDocument, TaskSubmission, UserTable
+
+BENCH_USERNAME = 'benchmark-agent'
+BATCH_SIZE = 2000
+# One task in SUBMISSION_EVERY carries a submission with DOCUMENTS_PER_SUBMISSION documents
+SUBMISSION_EVERY = 4
+DOCUMENTS_PER_SUBMISSION = 2
+STATUSES = ['pending', 'in_progress', 'overdue', 'completed']
+PRIORITIES = ['high', 'medium', 'low']
+
+
+class Dataset:
+    """
+    Synthetic rows owned by one benchmark agent, grown in place so each size
+    reuses the rows of the previous one.
+    """
+
+    def __init__(self):
+        self.agent, _ = UserTable.objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={'phone_number': '9000000000', 'email': 'benchmark@example.com', 'type': 'agent'},
+        )
+        self.case = None
+        self.rows = 0
+
+    def grow_to(self, rows):
+        added = range(self.rows, rows)
+        if added:
+            self.add_tasks(added)
+            self.add_cases(added)
+            self.add_visits(added)
+        self.rows = max(self.rows, rows)
+
+    def add_tasks(self, indexes):
+        now = timezone.now()
+        tasks = Task.objects.bulk_create(
+            (Task(
+                title=f'Recovery visit {i}',
+                description='Collect the overdue EMI and record the borrower response.',
+                assignee=self.agent,
+                priority=PRIORITIES[i % len(PRIORITIES)],
+                status=STATUSES[i % len(STATUSES)],
+                due_date=now + timedelta(days=i % 120 - 60, minutes=i),
+                completed_date=now if STATUSES[i % len(STATUSES)] == 'completed' else None,
+                location='Pune',
+                tags=['benchmark', PRIORITIES[i % len(PRIORITIES)]],
+            ) for i in indexes),
+            batch_size=BATCH_SIZE,
+        )
+        submissions = TaskSubmission.objects.bulk_create(
+            (TaskSubmission(task=task, submitted_by=self.agent, notes='Borrower met')
+             for i, task in zip(indexes, tasks) if i % SUBMISSION_EVERY == 0),
+            batch_size=BATCH_SIZE,
+        )
+        TaskDocument.objects.bulk_create(
+            (TaskDocument(submission=submission, document=f'task_documents/bench_{submission.pk}_{j}.jpg',
+                          document_type='photo')
+             for submission in submissions for j in range(DOCUMENTS_PER_SUBMISSION)),
+            batch_size=BATCH_SIZE,
+        )
+
+    def add_cases(self, indexes):
+        cases = Case.objects.bulk_create(
+            (Case(
+                borrower_name=f'Borrower {i}',
+                location='Pune',
+                outstanding_amount=f'{1000 + i % 50000}.50',
+                visit_status='pending',
+                next_action='Visit',
+                priority=PRIORITIES[i % len(PRIORITIES)],
+                assigned_to=BENCH_USERNAME,
+            ) for i in indexes),
+            batch_size=BATCH_SIZE,
+        )
+        if self.case is None:
+            self.case = cases[0]
+
+    def add_visits(self, indexes):
+        today = timezone.localdate()
+        Visit.objects.bulk_create(
+            (Visit(
+                case=self.case,
+                date=today - timedelta(days=i % 365),
+                time=time(9 + i % 9, i % 60),
+                purpose='Collection',
+                status='completed',
+                borrower_met=i % 2 == 0,
+                remarks='Promised to pay next week',
+            ) for i in indexes),
+            batch_size=BATCH_SIZE,
+        )
@@ -0,0 +1,131 @@
+import gc
+import statistics
+import time
+import tracemalloc
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from cases.models import Case, Visit
+from cases.serializers import CaseSerializer, VisitSerializer
+from users.models import Task
+from rest_framework.renderers import JSONRenderer
+from users.serializers import TaskSerializer, TaskSlimSerializer
+from core.renderers import FastJSONRenderer
+from core.sync import make_token
+from .datasets import BENCH_USERNAME
+
+
+def serializer_benchmarks(dataset):
+    """(name, callable) pairs that serialize every benchmark row already loaded in memory"""
+    tasks = list(Task.objects.filter(assignee=dataset.agent).prefetch_related('submissions__documents'))
+    cases = list(Case.objects.filter(assigned_to=BENCH_USERNAME))
+    visits = list(Visit.objects.filter(case=dataset.case))
+    return [
+        ('serializer.TaskSerializer', lambda: TaskSerializer(tasks, many=True).data),
+        ('serializer.TaskSlimSerializer', lambda: TaskSlimSerializer(tasks, many=True).data),
+        ('serializer.CaseSerializer', lambda: CaseSerializer(cases, many=True).data),
+        ('serializer.VisitSerializer', lambda: VisitSerializer(visits, many=True).data),
+    ]
+
+
+def render_benchmarks(dataset):
+    """(name, callable) pairs that only encode already serialized list responses, per renderer"""
+    tasks = Task.objects.filter(assignee=dataset.agent).prefetch_related('submissions__documents')
+    payloads = [
+        ('tasks', TaskSerializer(tasks, many=True).data),
+        ('cases', CaseSerializer(Case.objects.filter(assigned_to=BENCH_USERNAME), many=True).data),
+    ]
+    benchmarks = []
+    for name, data in payloads:
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            benchmarks.append((f'render.{type(renderer).__name__}.{name}', lambda r=renderer, d=data: r.render(d)))
+    return benchmarks
+
+
+def request_benchmarks(dataset):
+    """(name, callable) pairs that run a full request/response cycle through the test client"""
+    client = Client()
+
+    def get(url, params=None):
+        def call():
+            response = client.get(url, params or {})
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+            # Streaming bodies are only produced while they are consumed
+            return b''.join(response.streaming_content) if response.streaming else response.content
+        return call
+
+    return [
+        ('request.user-tasks', get(reverse('user-tasks', args=[BENCH_USERNAME]))),
+        ('request.taskboard', get(reverse('taskboard'), {'assignee': dataset.agent.id})),
+        ('request.calendar', get(reverse('calendar'), {'assignee': dataset.agent.id})),
+        ('request.task-list', get(reverse('task-list'), {'assignee': dataset.agent.id, 'page_size': 500})),
+        ('request.case-list', get(reverse('case-list'), {'assigned_to': BENCH_USERNAME})),
+        ('request.visit-list', get(reverse('visit-list'), {'case': dataset.case.id})),
+        ('request.case-export', get(reverse('case-export'), {'assigned_to': BENCH_USERNAME, 'output': 'ndjson'})),
+        # A first download against a client that is up to date
+        ('request.sync-full', get(reverse('sync'), {'agent': BENCH_USERNAME})),
+        ('request.sync-delta', get(reverse('sync'), {'agent': BENCH_USERNAME, 'since': make_token(timezone.now())})),
+    ]
+
+
+class QueryCounter:
+    # connection.queries is reset by request_started, so count through a wrapper instead
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(name, rows, call, repeat):
+    """Time `repeat` runs, then one more under tracemalloc for the memory peak"""
+    timings = []
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        call()
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'rows': rows,
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'rows_per_second': rows / min(timings) if min(timings) else None,
+        'peak_memory_bytes': peak,
+        'queries': queries.count,
+    }
+
+
+def compare(previous, current):
+    """Pair up results of two runs by (name, rows) with the ratio of their best times"""
+    before = {(result['name'], result['rows']): result for result in previous['results']}
+    rows = []
+    for result in current['results']:
+        old = before.get((result['name'], result['rows']))
+        if old is None:
+            continue
+        rows.append({
+            'name': result['name'],
+            'rows': result['rows'],
+            'before': old['seconds_min'],
+            'after': result['seconds_min'],
+            'ratio': result['seconds_min'] / old['seconds_min'] if old['seconds_min'] else None,
+            'memory_ratio': (result['peak_memory_bytes'] / old['peak_memory_bytes']
+                             if old['peak_memory_bytes'] else None),
+        })
+    return rows
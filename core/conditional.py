@@ -0,0 +1,89 @@
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def representation_key(request):
+    """Everything besides the rows that selects a response body: path, query params and format"""
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    return request.path, tuple(params), getattr(request, 'accepted_media_type', None)
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 carrying the validators if the request's preconditions match, else None"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let clients keep the body but revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def aggregate_validators(queryset):
+    return queryset.order_by().aggregate(count=Count('pk'), latest=Max('updated_at'))
+
+
+async def aaggregate_validators(queryset):
+    return await queryset.order_by().aaggregate(count=Count('pk'), latest=Max('updated_at'))
+
+
+def list_etag(request, validators, *extra):
+    """
+    ETag of a list from its row count and latest updated_at: an edit moves
+    the maximum and a delete changes the count. No Last-Modified is sent,
+    since a delete alone would not move it.
+    """
+    return make_etag(representation_key(request), validators['count'], validators['latest'], extra)
+
+
+class ConditionalGetMixin:
+    """
+    ETag (and Last-Modified for detail) on a viewset's list and retrieve,
+    checked with one aggregate or one-column query before any row is
+    loaded or serialized. Models need an auto_now updated_at field.
+    """
+
+    def etag_parts(self):
+        """Anything besides the rows and request that the representation depends on"""
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        validators = aggregate_validators(self.filter_queryset(self.get_queryset()))
+        etag = list_etag(request, validators, *self.etag_parts())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = (
+                queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .prefetch_related(None).values('updated_at').first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            row = None
+        if row is None:
+            # Let the normal lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+        etag = make_etag(representation_key(request), row['updated_at'], self.etag_parts())
+        response = not_modified(request, etag, row['updated_at'])
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, row['updated_at'])
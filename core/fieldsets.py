@@ -0,0 +1,84 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+def parse_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def select_fields(available, params):
+    """
+    The names in `available` kept by ?fields=a,b and/or ?omit=c, in their
+    declared order, or None when the request asks for no projection.
+    """
+    fields = parse_names(params.get('fields'))
+    omit = parse_names(params.get('omit'))
+    if not fields and not omit:
+        return None
+    unknown = sorted(set(fields + omit) - set(available))
+    if unknown:
+        raise ValidationError({"fields": [f"Unknown field(s): {', '.join(unknown)}"]})
+    return [name for name in available if (not fields or name in fields) and name not in omit]
+
+
+class SparseFieldsetMixin:
+    """
+    Let a read request narrow a model serializer with ?fields= / ?omit=.
+
+    Only the top-level serializer (or the child of a top-level many=True
+    list) is narrowed; nested serializers and serializers handling input
+    keep every field. The query params come from context['query_params'],
+    or from the request in the context.
+    """
+
+    # Serializer field -> model fields it reads, for fields not backed by their own column
+    field_dependencies = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        params = self.fieldset_params()
+        if params is None:
+            return fields
+        selected = select_fields(list(fields), params)
+        if selected is None:
+            return fields
+        return {name: fields[name] for name in selected}
+
+    def fieldset_params(self):
+        if hasattr(self, 'initial_data') or self.root not in (self, self.parent):
+            return None
+        if 'query_params' in self.context:
+            return self.context['query_params']
+        request = self.context.get('request')
+        return getattr(request, 'query_params', None)
+
+    @classmethod
+    def projection(cls, params, always=()):
+        """
+        (selected serializer fields, model columns they need) for the
+        request, or (None, None) when every field is wanted.
+        """
+        fields = cls().fields
+        selected = select_fields(list(fields), params)
+        if selected is None:
+            return None, None
+        model_fields = cls.Meta.model._meta
+        columns = {model_fields.pk.name, *always}
+        for name in selected:
+            for source in cls.field_dependencies.get(name, [fields[name].source]):
+                head = source.split('.')[0]
+                try:
+                    field = model_fields.get_field(head)
+                except FieldDoesNotExist:
+                    continue
+                if field.concrete and not field.many_to_many:
+                    columns.add(head)
+        return selected, sorted(columns)
+
+    @classmethod
+    def project(cls, queryset, params, always=()):
+        """Apply .only() for the requested fields; returns (queryset, selected fields or None)"""
+        selected, columns = cls.projection(params, always)
+        if columns is not None:
+            queryset = queryset.only(*columns)
+        return queryset, selected
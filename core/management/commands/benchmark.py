@@ -0,0 +1,88 @@
+import json
+import platform
+import subprocess
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from core.benchmarks.datasets import Dataset
+from core.benchmarks.suite import compare, measure, render_benchmarks, request_benchmarks, serializer_benchmarks
+
+UNCACHED = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+class Command(BaseCommand):
+    """Django command to benchmark serializers and list endpoints on synthetic data"""
+
+    help = (
+        "Generate synthetic tasks, cases and visits at each size, time serialization, JSON encoding and "
+        "full request/response cycles, record memory peaks and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per benchmark; the best is reported.')
+        parser.add_argument('--only', choices=['serializer', 'render', 'request'], help='Run one group of benchmarks.')
+        parser.add_argument('--output', help='Results file (default: benchmark-<git revision>.json).')
+        parser.add_argument('--compare', help='Earlier results file to compare against.')
+        parser.add_argument('--keep', action='store_true', help='Keep the generated rows instead of rolling back.')
+
+    def handle(self, *args, **options):
+        revision = git_revision()
+        report = {
+            'revision': revision,
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'results': [],
+        }
+
+        # Measure the uncached code paths, and let the test client's host through
+        with override_settings(CACHES=UNCACHED, ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            dataset = Dataset()
+            for rows in sorted(options['sizes']):
+                self.stdout.write(f"Generating {rows} rows...")
+                dataset.grow_to(rows)
+                benchmarks = []
+                if options['only'] in (None, 'serializer'):
+                    benchmarks += serializer_benchmarks(dataset)
+                if options['only'] in (None, 'render'):
+                    benchmarks += render_benchmarks(dataset)
+                if options['only'] in (None, 'request'):
+                    benchmarks += request_benchmarks(dataset)
+                for name, call in benchmarks:
+                    result = measure(name, rows, call, options['repeat'])
+                    report['results'].append(result)
+                    self.stdout.write(
+                        f"  {name:<32} {result['seconds_min'] * 1000:>10.1f} ms "
+                        f"{result['peak_memory_bytes'] / 2 ** 20:>8.1f} MiB peak {result['queries']:>4} queries"
+                    )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        output = options['output'] or f'benchmark-{revision}.json'
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(report['results'])} result(s) to {output}"))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)
+            self.stdout.write(f"Compared with {previous.get('revision', options['compare'])}:")
+            for row in compare(previous, report):
+                ratio = f"{row['ratio']:.2f}x" if row['ratio'] is not None else 'n/a'
+                self.stdout.write(
+                    f"  {row['name']:<32} {row['rows']:>7} rows "
+                    f"{row['before'] * 1000:>10.1f} -> {row['after'] * 1000:>10.1f} ms ({ratio})"
+                )
@@ -0,0 +1,93 @@
+import re
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.test import RequestFactory
+from rest_framework.request import Request
+from cases.models import Case
+from cases.views import CaseViewSet, VisitViewSet
+from users.models import Task, UserTable
+from users.task_calendar import month_range, summary_rows, task_rows
+from users.taskboard import open_tasks_queryset, completed_tasks_queryset
+from users.views import TaskViewSet
+from core.sync import changed_rows, removed_rows
+
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)(?:\s|$)'),
+}
+
+
+def viewset_queryset(viewset_class, params):
+    """Build the list queryset a viewset would run for the given query params"""
+    request = Request(RequestFactory().get('/', params))
+    view = viewset_class(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    if view.paginator is not None:
+        queryset = queryset[:view.paginator.page_size]
+    return queryset
+
+
+class Command(BaseCommand):
+    """Django command to EXPLAIN every endpoint's queryset and report sequential scans"""
+
+    help = "Run EXPLAIN on the querysets behind the task, case and visit endpoints and report sequential scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error if any endpoint plans a sequential scan.')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the full plan for every endpoint.')
+
+    def get_endpoint_querysets(self):
+        assignee_id = UserTable.objects.values_list('id', flat=True).first() or 1
+        case = Case.objects.values('id', 'assigned_to').first() or {'id': 1, 'assigned_to': 'agent'}
+        since = timezone.now()
+        sync = changed_rows(case['assigned_to'], assignee_id, since)
+        return [
+            ('taskboard.open', open_tasks_queryset(assignee_id)),
+            ('taskboard.completed', completed_tasks_queryset(assignee_id)),
+            ('task-list', viewset_queryset(TaskViewSet, {})),
+            ('task-list?assignee&status', viewset_queryset(TaskViewSet, {'assignee': assignee_id, 'status': 'pending'})),
+            ('task-list?assignee&due_category', viewset_queryset(TaskViewSet, {'assignee': assignee_id, 'due_category': 'due_this_week'})),
+            ('calendar', task_rows(assignee_id, month_range(2025, 1))),
+            ('calendar?summary', summary_rows(assignee_id, month_range(2025, 1))),
+            ('user-tasks', Task.objects.filter(assignee_id=assignee_id).order_by('due_date')),
+            ('case-list?assigned_to&visit_status', viewset_queryset(CaseViewSet, {'assigned_to': case['assigned_to'], 'visit_status': 'pending'})),
+            ('case-list?assigned_to&priority', viewset_queryset(CaseViewSet, {'assigned_to': case['assigned_to'], 'priority': 'high'})),
+            ('visit-list?case', viewset_queryset(VisitViewSet, {'case': case['id']})),
+            ('sync.cases', sync['case']),
+            ('sync.visits', sync['visit']),
+            ('sync.tasks', sync['task']),
+            ('sync.deleted', removed_rows(case['assigned_to'], since)),
+        ]
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Small tables are always cheaper to scan; ask whether an index *could* be used
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Sequential scan detection is not supported on {connection.vendor}")
+
+        offenders = []
+        for name, queryset in self.get_endpoint_querysets():
+            plan = self.explain(queryset)
+            scanned = sorted(set(pattern.findall(plan)))
+            if scanned:
+                offenders.append(name)
+                self.stdout.write(self.style.WARNING(f"{name}: sequential scan on {', '.join(scanned)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: OK"))
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if offenders and options['strict']:
+            raise CommandError(f"Sequential scans planned for: {', '.join(offenders)}")
+        if not offenders:
+            self.stdout.write(self.style.SUCCESS('All endpoints are covered by indexes.'))
@@ -0,0 +1,45 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from core.storage import BLOB_PREFIX, ContentAddressedStorage, blob_reference_counts
+
+
+class Command(BaseCommand):
+    """Django command to delete content-addressed blobs that no row refers to any more"""
+
+    help = "Report blob reference counts and delete orphaned blobs from the content-addressed document store."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=3600,
+                            help='Keep orphans younger than this many seconds; their row may not be saved yet.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def iter_blobs(self, storage):
+        root = storage.path(BLOB_PREFIX)
+        for directory, subdirectories, files in os.walk(root):
+            if directory == root and 'tmp' in subdirectories:
+                subdirectories.remove('tmp')
+            for filename in files:
+                full_path = os.path.join(directory, filename)
+                yield os.path.relpath(full_path, storage.location).replace(os.sep, '/'), full_path
+
+    def handle(self, *args, **options):
+        storage = ContentAddressedStorage()
+        references = blob_reference_counts()
+        cutoff = time.time() - options['grace']
+        blobs = kept = deleted = freed = 0
+
+        for name, full_path in self.iter_blobs(storage):
+            blobs += 1
+            if references[name] or os.path.getmtime(full_path) > cutoff:
+                kept += 1
+                continue
+            size = os.path.getsize(full_path)
+            if not options['dry_run']:
+                os.remove(full_path)
+            deleted += 1
+            freed += size
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f"{blobs} blob(s), {sum(references.values())} reference(s), {kept} kept")
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} orphaned blob(s), {freed} bytes"))
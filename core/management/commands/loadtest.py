@@ -0,0 +1,70 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    """Django command to compare request throughput of one or more running servers"""
+
+    help = (
+        "Hammer a URL on one or more servers with concurrent clients and report throughput and latency, "
+        "e.g. runserver on :8000 against the gunicorn profile on :8001."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('servers', nargs='+', help='Base URLs, e.g. http://localhost:8000')
+        parser.add_argument('--path', default='/api/cases/', help='Request path to load.')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=20.0, help='Seconds per server.')
+
+    def client(self, url, deadline):
+        latencies, errors = [], 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+            except (urllib.error.URLError, OSError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+        return latencies, errors
+
+    def run(self, url, concurrency, duration):
+        deadline = time.monotonic() + duration
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: self.client(url, deadline), range(concurrency)))
+        latencies = [latency for samples, _ in results for latency in samples]
+        errors = sum(errors for _, errors in results)
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'rps': len(latencies) / duration,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'mean': (statistics.mean(latencies) if latencies else 0.0) * 1000,
+        }
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'server':<32} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        baseline = None
+        for server in options['servers']:
+            url = server.rstrip('/') + options['path']
+            stats = self.run(url, options['concurrency'], options['duration'])
+            line = (f"{server:<32} {stats['rps']:>9.1f} {stats['p50']:>8.1f} {stats['p95']:>8.1f} "
+                    f"{stats['p99']:>8.1f} {stats['errors']:>7}")
+            if baseline:
+                line += f"  ({stats['rps'] / baseline:.2f}x)"
+            baseline = baseline or stats['rps'] or None
+            self.stdout.write(line)
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    """Django command to delete sync tombstones older than the retention window"""
+
+    help = "Delete tombstones older than SYNC_TOMBSTONE_DAYS; clients with older tokens get a full sync instead."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30),
+                            help='Keep tombstones from the last DAYS days.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = Tombstone.objects.filter(removed_at__lt=cutoff).delete()
+        self.stdout.write(f'Deleted {deleted} tombstone(s) older than {options["days"]} day(s)')
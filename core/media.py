@@ -0,0 +1,130 @@
+import mimetypes
+import os
+import re
+from pathlib import PurePosixPath
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from .storage import BLOB_PREFIX
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single satisfiable byte range, None to serve the
+    whole file, or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: answering with the full body is allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(STREAM_BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def file_validators(name, stat):
+    """ETag and Last-Modified computed from the file name and stat, never its contents"""
+    last_modified = int(stat.st_mtime)
+    if name.startswith(f'{BLOB_PREFIX}/'):
+        # Content-addressed blobs are named after their SHA-256 and never change
+        return f'"{PurePosixPath(name).stem}"', last_modified, True
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"', last_modified, False
+
+
+def sendfile_response(full_path, name, content_type):
+    backend = getattr(settings, 'MEDIA_SENDFILE_BACKEND', None)
+    response = HttpResponse(content_type=content_type)
+    if backend == 'x-accel-redirect':
+        prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + name
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with conditional GET and byte-range support.
+
+    With MEDIA_SENDFILE_BACKEND set to 'x-sendfile' or 'x-accel-redirect' the
+    body is left to the front-end proxy, which then handles ranges itself.
+    Otherwise whole files go out as a FileResponse, which lets the WSGI server
+    use sendfile(), and ranges are streamed from a seek.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+
+    name = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    stat = os.stat(full_path)
+    etag, last_modified, immutable = file_validators(name, stat)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if getattr(settings, 'MEDIA_SENDFILE_BACKEND', None):
+            response = sendfile_response(full_path, name, content_type)
+        else:
+            byte_range = None
+            if 'Range' in request.headers and if_range_matches(request, etag, last_modified):
+                byte_range = parse_range(request.headers['Range'], stat.st_size)
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+            elif byte_range:
+                start, end = byte_range
+                length = end - start + 1
+                response = StreamingHttpResponse(
+                    iter_file_range(full_path, start, length), status=206, content_type=content_type
+                )
+                response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+                response['Content-Length'] = str(length)
+            else:
+                response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, max-age=31536000, immutable' if immutable else 'private, no-cache'
+    return response
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('case', 'Case'), ('visit', 'Visit'), ('task', 'Task')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('agent', models.CharField(max_length=255)),
+                ('removed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['agent', 'removed_at'], name='tombstone_agent_removed_idx'), models.Index(fields=['removed_at'], name='tombstone_removed_idx')],
+            },
+        ),
+    ]
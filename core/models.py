@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    A row that left an agent's sync set: deleted, or reassigned to someone
+    else. Kept for SYNC_TOMBSTONE_DAYS so offline clients can drop it.
+    """
+    KIND_CHOICES = [
+        ('case', 'Case'),
+        ('visit', 'Visit'),
+        ('task', 'Task'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Username of the agent who had the row
+    agent = models.CharField(max_length=255)
+    removed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['agent', 'removed_at'], name='tombstone_agent_removed_idx'),
+            models.Index(fields=['removed_at'], name='tombstone_removed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} removed for {self.agent}"
+
+    @classmethod
+    def bury(cls, kind, agent, object_ids):
+        """Record that `object_ids` of `kind` left `agent`'s sync set"""
+        if agent and object_ids:
+            cls.objects.bulk_create(cls(kind=kind, agent=agent, object_id=pk) for pk in object_ids)
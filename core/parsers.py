@@ -0,0 +1,30 @@
+from io import BytesIO
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UTF8_NAMES = ('utf-8', 'utf8')
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes UTF-8 bodies with orjson when it is installed.
+
+    Bodies orjson rejects are handed to the stock parser, so malformed input
+    produces the same ParseError message and anything the stdlib accepts
+    (such as integers beyond 64 bits) still parses.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in UTF8_NAMES:
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.db import connection
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# (metric name, help text, attribute of RequestProfile)
+METRICS = [
+    ('http_request_duration_seconds', 'Wall time spent handling the request.', 'duration'),
+    ('http_request_db_queries', 'Database queries run by the request.', 'query_count'),
+    ('http_request_db_duration_seconds', 'Time spent waiting on the database.', 'query_time'),
+    ('http_request_serializer_duration_seconds', 'Time spent building serializer output.', 'serializer_time'),
+]
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self, keep_sql=False):
+        self.keep_sql = keep_sql
+        self.duration = 0.0
+        self.query_count = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_count += 1
+            self.query_time += elapsed
+            if self.keep_sql:
+                self.queries.append((elapsed, sql, params))
+
+
+class Summary:
+    """Lifetime count and sum plus a window of recent samples for the quantiles"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [(q, 0.0) for q in QUANTILES]
+        return [(q, ordered[min(len(ordered) - 1, int(len(ordered) * q))]) for q in QUANTILES]
+
+
+class MetricsRegistry:
+    """Per-process store of request summaries, keyed by metric and endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        window = getattr(settings, 'REQUEST_PROFILING_WINDOW', 1000)
+        self.summaries = defaultdict(lambda: Summary(window))
+
+    def record(self, endpoint, method, profile):
+        with self.lock:
+            for name, _, attribute in METRICS:
+                self.summaries[(name, endpoint, method)].observe(getattr(profile, attribute))
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            for name, help_text, _ in METRICS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} summary')
+                for (metric, endpoint, method), summary in sorted(self.summaries.items()):
+                    if metric != name:
+                        continue
+                    labels = f'endpoint="{escape_label(endpoint)}",method="{method}"'
+                    for quantile, value in summary.quantiles():
+                        lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value:.6g}')
+                    lines.append(f'{name}_sum{{{labels}}} {summary.sum:.6g}')
+                    lines.append(f'{name}_count{{{labels}}} {summary.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+_original_data = BaseSerializer.data
+
+
+def _timed_data(self):
+    profile = current_profile.get()
+    if profile is None:
+        return _original_data.fget(self)
+    started = time.perf_counter()
+    try:
+        return _original_data.fget(self)
+    finally:
+        profile.serializer_time += time.perf_counter() - started
+
+
+def time_serializers(enabled):
+    """Route BaseSerializer.data through the timer, or put the original back"""
+    # Serializer.data and ListSerializer.data both go through BaseSerializer.data
+    BaseSerializer.data = property(_timed_data) if enabled else _original_data
+
+
+def profiling_setting_changed(setting, value, **kwargs):
+    # The patch is process-wide, so it must not outlive override_settings(REQUEST_PROFILING=True)
+    if setting == 'REQUEST_PROFILING':
+        time_serializers(bool(value))
+
+
+setting_changed.connect(profiling_setting_changed)
+
+
+class RequestProfilingMiddleware:
+    """
+    Record wall time, query count and time, and serializer time per resolved
+    URL name, exposed at the metrics endpoint.
+
+    Enabled with REQUEST_PROFILING. The middleware is sync-only: queries are
+    counted with connection.execute_wrapper, which is per thread, so async
+    views are run through async_to_sync on the request's thread while it is
+    on. With REQUEST_PROFILING_SLOW_MS set, the full SQL of any slower request
+    is logged.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'REQUEST_PROFILING_SLOW_MS', None)
+        time_serializers(True)
+
+    def __call__(self, request):
+        profile = RequestProfile(keep_sql=self.slow_ms is not None)
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            profile.duration = time.perf_counter() - started
+            current_profile.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or 'unresolved'
+        registry.record(endpoint, request.method, profile)
+        if self.slow_ms is not None and profile.duration * 1000 >= self.slow_ms:
+            self.log_slow_request(request, endpoint, profile)
+        return response
+
+    def log_slow_request(self, request, endpoint, profile):
+        queries = '\n'.join(
+            f'  [{elapsed * 1000:.1f} ms] {sql} {params!r}' for elapsed, sql, params in profile.queries
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.get_full_path()} ({endpoint}): "
+            f"{profile.duration * 1000:.1f} ms, {profile.query_count} queries in "
+            f"{profile.query_time * 1000:.1f} ms, serializers {profile.serializer_time * 1000:.1f} ms\n{queries}"
+        )
@@ -0,0 +1,47 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # datetime/date/time go through DRF's encoder so their format stays exactly as before
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Output matches the stock renderer's compact form: the same separators,
+    raw UTF-8, escaped U+2028/U+2029, and datetimes, Decimals, UUIDs,
+    querysets and generators handled by DRF's own encoder. Anything orjson
+    refuses (integers beyond 64 bits, indented output for the browsable API,
+    non-default JSON settings) is rendered by the stock path instead.
+
+    Floats are the exception, and spotting them would mean walking every
+    payload. orjson spells very large and very small floats differently
+    (1e16 for 1e+16, 1.5e-7 for 1.5e-07, -0.000025 for -2.5e-05), parsing
+    back to the same value. It writes NaN and +/-Infinity as null, where the
+    stock renderer (STRICT_JSON) raises ValueError. Model numbers are Decimals
+    sent as strings, so only floats stored in JSONFields such as Task.tags
+    render differently, byte for byte.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None
+            or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in ret:
+                ret = ret.replace(raw, escaped)
+        return ret
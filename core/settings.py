@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
+from urllib.parse import unquote, urlparse
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,12 +22,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-=p86+c^z=*d8zp)k+7+ge6_@#zk*ah=nxya4o1sb^^uoo)nb9^'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'django-insecure-=p86+c^z=*d8zp)k+7+ge6_@#zk*ah=nxya4o1sb^^uoo)nb9^'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# docker-compose sets DEBUG=1 for development; the image itself runs without it.
+DEBUG = os.environ.get('DEBUG', '0').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost,127.0.0.1,0.0.0.0').split(',')
 
 
 # Application definition
@@ -46,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,8 +59,23 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.RequestProfilingMiddleware',
 ]
 
+# Delta sync (/api/sync/): how long deletes are remembered, and how far each
+# token lags behind its read so rows from transactions still committing are not missed
+SYNC_TOMBSTONE_DAYS = 30
+SYNC_OVERLAP_SECONDS = 30
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+
+# Per-endpoint latency/query summaries at /metrics/ (admin only). Off unless enabled.
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', '0').lower() in ('1', 'true', 'yes')
+REQUEST_PROFILING_WINDOW = 1000  # recent requests per endpoint used for p50/p95/p99
+# Log the full SQL of requests slower than this many milliseconds (None disables)
+REQUEST_PROFILING_SLOW_MS = int(os.environ['REQUEST_PROFILING_SLOW_MS']) if os.environ.get('REQUEST_PROFILING_SLOW_MS') else None
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -87,13 +108,90 @@ DATABASES = {
         'PASSWORD': 'django_password',
         'HOST': 'db',
         'PORT': 5432,
-        'CONN_MAX_AGE': 60,
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Persistent connections are checked before reuse instead of failing the request
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'connect_timeout': 10,
         }
     }
 }
 
+if os.environ.get('DATABASE_URL'):
+    _database_url = urlparse(os.environ['DATABASE_URL'])
+    DATABASES['default'].update({
+        'NAME': unquote(_database_url.path.lstrip('/')),
+        'USER': unquote(_database_url.username or ''),
+        'PASSWORD': unquote(_database_url.password or ''),
+        'HOST': _database_url.hostname or '',
+        'PORT': _database_url.port or 5432,
+    })
+
+# Optional server-side pool (needs psycopg 3 with the pool extra). Each worker
+# process keeps between DB_POOL_MIN_SIZE and DB_POOL_MAX_SIZE connections, so
+# Postgres max_connections should cover workers * DB_POOL_MAX_SIZE.
+if os.environ.get('DB_POOL_MAX_SIZE'):
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # pooling replaces persistent connections
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ['DB_POOL_MAX_SIZE']),
+        'timeout': 10,
+    }
+
+
+# Cache
+# Read-through cache for task read endpoints (see users/cache.py) and the OTP
+# IP throttle. Defaults to an in-process cache, which is only correct for a
+# single process; set REDIS_URL to share it between workers and the sweeper.
+# docker-compose does so for every service.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'api-cache',
+        }
+    }
+
+# Seconds a cached taskboard/calendar/user-task response may be served for.
+# Writes invalidate immediately; this only bounds drift of time_remaining.
+TASK_CACHE_TIMEOUT = int(os.environ.get('TASK_CACHE_TIMEOUT', 60))
+
+
+# OTP authentication
+OTP_TTL_SECONDS = 600
+OTP_MAX_ATTEMPTS = 5
+# Codes a phone number may be sent per window, counted on its PhoneOTP row
+OTP_MAX_ISSUES = 5
+OTP_ISSUE_WINDOW_SECONDS = 3600
+
+REST_FRAMEWORK = {
+    # orjson-backed JSON when installed; falls back to DRF's stdlib encoder/decoder
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Reverse proxies in front of the app. Throttles take the client IP from that many
+    # X-Forwarded-For entries; with 0 they use REMOTE_ADDR and ignore the header,
+    # which clients can set to anything
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'otp_ip': '120/min',
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -136,6 +234,21 @@ STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# How core.media.serve_media hands file bodies to a front-end proxy: None serves
+# them from Django, 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx,
+# with an internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT).
+MEDIA_SENDFILE_BACKEND = os.environ.get('MEDIA_SENDFILE_BACKEND') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Resumable document uploads are assembled here before being moved into MEDIA_ROOT.
+# Keep it on the same filesystem as MEDIA_ROOT so the final move is a rename.
+DOCUMENT_UPLOAD_STAGING_DIR = BASE_DIR / 'upload_staging'
+DOCUMENT_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+DOCUMENT_UPLOAD_MAX_CHUNK_SIZE = 5 * 1024 * 1024
+
+# Threads building visit selfie renditions after the save commits (0 builds them inline)
+VISIT_SELFIE_RENDITION_WORKERS = int(os.environ.get('VISIT_SELFIE_RENDITION_WORKERS', 2))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from pathlib import PurePosixPath
+from django.apps import apps
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count, FileField
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'blobs'
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that keeps each distinct file content exactly once.
+
+    The stream is hashed while it is written, and the stored name is derived
+    from the SHA-256 digest (blobs/ab/cd/<digest><ext>), so re-uploading the
+    same document points the row at the blob that is already on disk instead
+    of writing another copy. Several rows, across models, may share one blob,
+    so delete() never removes anything; orphaned blobs are reclaimed by the
+    gc_blobs management command.
+
+    Files saved before this storage was introduced keep their old names and
+    are served from the same MEDIA_ROOT.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, so there is nothing to deduplicate here
+        blob_length = len(self.blob_name('0' * 64, name))
+        if max_length is not None and blob_length > max_length:
+            raise SuspiciousFileOperation(
+                f'Storage can not find an available filename for "{name}". '
+                'Please make sure that the corresponding file field '
+                'allows sufficient "max_length".'
+            )
+        return name
+
+    def blob_name(self, digest, original_name):
+        extension = PurePosixPath(original_name).suffix.lower()
+        return f'{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def _save(self, name, content):
+        if hasattr(content, 'temporary_file_path'):
+            # A caller that already verified the digest passes it along instead of having it recomputed
+            return self._save_from_path(name, content.temporary_file_path(), getattr(content, 'sha256', None))
+
+        digest = hashlib.sha256()
+        staging_dir = os.path.join(self.location, BLOB_PREFIX, 'tmp')
+        os.makedirs(staging_dir, exist_ok=True)
+        fd, staging_path = tempfile.mkstemp(dir=staging_dir)
+        try:
+            with os.fdopen(fd, 'wb') as staged:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    staged.write(chunk)
+            return self._store(staging_path, self.blob_name(digest.hexdigest(), name))
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+
+    def _save_from_path(self, name, path, checksum=None):
+        if checksum is None:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as source:
+                for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                    digest.update(block)
+            checksum = digest.hexdigest()
+        return self._store(path, self.blob_name(checksum, name))
+
+    def _store(self, path, blob_name):
+        """Move the hashed file into place unless an identical blob is already stored"""
+        full_path = self.path(blob_name)
+        if os.path.exists(full_path):
+            # Restart gc_blobs' grace period: its reference counts may predate the row about to use this blob
+            os.utime(full_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            file_move_safe(path, full_path, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+        return blob_name
+
+    def delete(self, name):
+        """Blobs may be shared; only gc_blobs removes them once nothing refers to them"""
+
+
+def content_addressed_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def blob_reference_counts():
+    """Count the rows referring to each blob, across every model using the storage"""
+    counts = Counter()
+    for model, field in content_addressed_fields():
+        rows = (
+            model._default_manager.filter(**{f'{field.name}__startswith': f'{BLOB_PREFIX}/'})
+            .values_list(field.name)
+            .annotate(references=Count('pk'))
+            .order_by()
+        )
+        for name, references in rows:
+            counts[name] += references
+    return counts
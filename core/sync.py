@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from cases.models import Case, Visit
+from cases.serializers import CaseSerializer, VisitSerializer
+from users.models import Task
+from users.serializers import TaskSerializer
+from .models import Tombstone
+
+TOKEN_SALT = 'core.sync'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# time_remaining and due_category change with the clock, not with the row; clients derive them from due_date
+TASK_PARAMS = {'omit': 'time_remaining,due_category'}
+
+
+def make_token(moment):
+    return signing.dumps((moment - EPOCH) // timedelta(microseconds=1), salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """The instant a sync token stands for; raises signing.BadSignature for anything this server didn't issue"""
+    value = signing.loads(token, salt=TOKEN_SALT)
+    if not isinstance(value, int):
+        raise signing.BadSignature('Malformed sync token')
+    return EPOCH + timedelta(microseconds=value)
+
+
+def changed(queryset, since):
+    queryset = queryset.order_by('id')
+    return queryset if since is None else queryset.filter(updated_at__gte=since)
+
+
+def changed_rows(agent, agent_id, since=None):
+    """Querysets of the agent's cases, visits and tasks changed at or after `since`"""
+    tasks, _ = TaskSerializer.project(changed(Task.objects.filter(assignee_id=agent_id), since), TASK_PARAMS)
+    return {
+        'case': changed(Case.objects.filter(assigned_to=agent), since),
+        'visit': changed(Visit.objects.filter(case__assigned_to=agent), since),
+        'task': tasks.prefetch_related('submissions__documents'),
+    }
+
+
+def removed_rows(agent, since):
+    """(kind, id) of rows that left the agent's set at or after `since`"""
+    return (
+        Tombstone.objects.filter(agent=agent, removed_at__gte=since)
+        .order_by('object_id').values_list('kind', 'object_id').distinct()
+    )
+
+
+def changes(agent, agent_id, since=None, context=None):
+    """
+    The agent's cases, visits and tasks changed at or after `since`, the ids
+    that left their set since then, and the token to send next time.
+
+    Without `since`, or when it is older than the tombstones kept, every row
+    is returned with "reset" set, and the client replaces what it holds.
+
+    A row is stamped when it is saved but only becomes visible when its
+    transaction commits, so the next token lags the start of this read by
+    SYNC_OVERLAP_SECONDS. Rows changed in that overlap are sent again, and
+    clients apply them idempotently by id.
+    """
+    started = timezone.now()
+    retention = timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+    reset = since is None or since < started - retention
+    if reset:
+        since = None
+
+    # Rows are always sent whole: the request's ?fields= / ?omit= would drop ids the client merges on
+    context = {**(context or {}), 'query_params': {}}
+    querysets = changed_rows(agent, agent_id, since)
+    rows = {
+        'case': CaseSerializer(querysets['case'], many=True, context=context).data,
+        'visit': VisitSerializer(querysets['visit'], many=True, context=context).data,
+        'task': TaskSerializer(querysets['task'], many=True, context={**context, 'query_params': TASK_PARAMS}).data,
+    }
+
+    deleted = {kind: [] for kind in rows}
+    if not reset:
+        live = {(kind, item['id']) for kind, items in rows.items() for item in items}
+        for kind, object_id in removed_rows(agent, since):
+            # Moved away and back again: the row itself is in this response
+            if (kind, object_id) not in live:
+                deleted[kind].append(object_id)
+
+    overlap = timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 30))
+    following = started - overlap if since is None else max(since, started - overlap)
+    return {
+        'token': make_token(following),
+        'reset': reset,
+        **{f'{kind}s': items for kind, items in rows.items()},
+        'deleted': {f'{kind}s': ids for kind, ids in deleted.items()},
+    }
@@ -0,0 +1,505 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils.http import http_date
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import BaseSerializer
+from cases.models import Case, Visit
+from cases.serializers import CaseSerializer
+from core.parsers import FastJSONParser
+from core import profiling
+from core.profiling import registry
+from core.renderers import FastJSONRenderer, orjson
+from core.sync import make_token, read_token
+from core.storage import ContentAddressedStorage
+from users.models import DocumentUpload, Task, TaskDocument, TaskSubmission
+from users.tests import make_agent, make_tasks
+from users.views import UserTasksView
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        overrides = override_settings(MEDIA_ROOT=self.tmp)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.content = bytes(range(256)) * 40
+        os.makedirs(os.path.join(self.tmp, 'documents'))
+        with open(os.path.join(self.tmp, 'documents', 'scan.pdf'), 'wb') as f:
+            f.write(self.content)
+        self.url = reverse('media', args=['documents/scan.pdf'])
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_file_uses_file_response(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), self.content)
+        response.close()
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(self.body(response), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(self.body(response), self.content[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_conditional_requests_short_circuit(self):
+        first = self.client.get(self.url)
+        first.close()
+        mtime = os.stat(os.path.join(self.tmp, 'documents', 'scan.pdf')).st_mtime
+        self.assertEqual(first['Last-Modified'], http_date(mtime))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_blobs_are_immutable(self):
+        name = ContentAddressedStorage().save('documents/pan/pan.pdf', ContentFile(b'%PDF pan'))
+        response = self.client.get(reverse('media', args=[name]))
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(b"%PDF pan").hexdigest()}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_sendfile_offload(self):
+        with self.settings(MEDIA_SENDFILE_BACKEND='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/documents/scan.pdf')
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE_BACKEND='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.tmp, 'documents', 'scan.pdf'))
+
+    def test_paths_outside_media_root_are_not_served(self):
+        response = self.client.get('/media/../core/settings.py')
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('media', args=['documents/missing.pdf']))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SLOW_MS=None)
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        Case.objects.create(borrower_name='Ravi', location='Pune', outstanding_amount='10.00',
+                            visit_status='pending', next_action='Visit', priority='high', assigned_to='agent1')
+        self.admin = User.objects.create_user('ops', password='x', is_staff=True)
+
+    def test_requests_are_summarised_per_endpoint(self):
+        for _ in range(3):
+            self.client.get(reverse('case-list'))
+        self.client.force_login(self.admin)
+        metrics = self.client.get(reverse('metrics')).content.decode()
+
+        labels = 'endpoint="case-list",method="GET"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 3', metrics)
+        # The ETag aggregate and the rows
+        self.assertIn(f'http_request_db_queries{{{labels},quantile="0.99"}} 2', metrics)
+        self.assertIn(f'http_request_db_queries_sum{{{labels}}} 6', metrics)
+        self.assertIn('# TYPE http_request_serializer_duration_seconds summary', metrics)
+        self.assertIn(f'http_request_serializer_duration_seconds_count{{{labels}}} 3', metrics)
+
+    def test_serializer_timing_is_removed_with_profiling(self):
+        self.client.get(reverse('case-list'))
+        self.assertIsNot(BaseSerializer.data, profiling._original_data)
+        with override_settings(REQUEST_PROFILING=False):
+            self.assertIs(BaseSerializer.data, profiling._original_data)
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_requests_log_their_sql(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            self.client.get(reverse('case-list'), {'priority': 'high'})
+        self.assertIn('case-list', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+def route_names(patterns):
+    """Every named route in the URLconf, skipping namespaced apps such as the admin"""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if not pattern.namespace:
+                names |= route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+# Routes that read rows, with the request each one is measured with
+READ_ENDPOINTS = {
+    'task-list': lambda s: (reverse('task-list'), {'assignee': s.agent.id}),
+    'task-detail': lambda s: (reverse('task-detail', args=[s.task.id]), {}),
+    'user-tasks': lambda s: (reverse('user-tasks', args=[s.agent.username]), {}),
+    'taskboard': lambda s: (reverse('taskboard'), {'assignee': s.agent.id}),
+    'calendar': lambda s: (reverse('calendar'), {'assignee': s.agent.id}),
+    'document-upload-chunk': lambda s: (reverse('document-upload-chunk', args=[s.upload.id]), {}),
+    'case-list': lambda s: (reverse('case-list'), {'assigned_to': 'agent1'}),
+    'case-detail': lambda s: (reverse('case-detail', args=[s.case.id]), {}),
+    'case-export': lambda s: (reverse('case-export'), {'assigned_to': 'agent1'}),
+    'visit-list': lambda s: (reverse('visit-list'), {'case': s.case.id}),
+    'visit-detail': lambda s: (reverse('visit-detail', args=[s.visit.id]), {}),
+    'visit-export': lambda s: (reverse('visit-export'), {'output': 'ndjson'}),
+    'api-root': lambda s: (reverse('api-root'), {}),
+    'sync': lambda s: (reverse('sync'), {'agent': s.agent.username}),
+}
+
+# Routes that only write, or never touch the database
+NOT_MEASURED = {
+    'home', 'media', 'metrics',
+    'task-bulk', 'task-submission', 'user-register', 'user-metadata-update',
+    'user-document-upload', 'document-upload-session', 'document-upload-commit',
+    'request-otp', 'verify-otp',
+    'case-import-file', 'case-update-status', 'visit-update-status', 'visit-save-details',
+}
+
+
+class QueryScalingTests(TestCase):
+    """
+    Call every read route at two data volumes and fail if any of them runs
+    more queries on the larger one, i.e. has an N+1.
+    """
+    SMALL = 2
+    LARGE = 100
+
+    def setUp(self):
+        self.agent = make_agent()
+        self.task = make_tasks(self.agent, 1, days=0)[0]
+        self.case = Case.objects.create(borrower_name='Ravi', location='Pune', outstanding_amount='10.00',
+                                        visit_status='pending', next_action='Visit', priority='high',
+                                        assigned_to='agent1')
+        self.visit = Visit.objects.create(case=self.case, date='2025-01-01', time='10:00',
+                                          purpose='Collect', status='done')
+        self.upload = DocumentUpload.objects.create(user=self.agent, field='pan_file',
+                                                    filename='pan.pdf', size=10)
+        self.seeded = 0
+
+    def seed(self, scale):
+        """Grow every table the read routes touch by `scale` rows per kind"""
+        make_tasks(self.agent, scale, status='pending', days=0, with_documents=3)
+        make_tasks(self.agent, scale, status='pending', days=20, with_documents=3)
+        make_tasks(self.agent, scale, status='completed', with_documents=3)
+        for i in range(scale):
+            submission = TaskSubmission.objects.create(task=self.task, submitted_by=self.agent, notes='again')
+            TaskDocument.objects.bulk_create(
+                TaskDocument(submission=submission, document=f'task_documents/extra_{self.seeded + i}_{j}.pdf',
+                             document_type='photo')
+                for j in range(3)
+            )
+        Case.objects.bulk_create(
+            Case(borrower_name=f'Borrower {self.seeded + i}', location='Pune', outstanding_amount='10.00',
+                 visit_status='pending', next_action='Visit', priority='low', assigned_to='agent1')
+            for i in range(scale)
+        )
+        Visit.objects.bulk_create(
+            Visit(case=self.case, date='2025-01-02', time='10:00', purpose='Collect', status='done')
+            for _ in range(scale)
+        )
+        self.seeded += scale
+
+    def measure(self):
+        counts = {}
+        for name, build in READ_ENDPOINTS.items():
+            url, params = build(self)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, f'{name} returned {response.status_code}')
+            counts[name] = len(queries)
+        return counts
+
+    def scaling_endpoints(self):
+        self.seed(self.SMALL)
+        small = self.measure()
+        self.seed(self.LARGE - self.SMALL)
+        large = self.measure()
+        return {name: (small[name], large[name]) for name in small if large[name] != small[name]}
+
+    def test_every_route_is_classified(self):
+        unclassified = route_names(get_resolver().url_patterns) - set(READ_ENDPOINTS) - NOT_MEASURED
+        self.assertEqual(unclassified, set(), 'Add new routes to READ_ENDPOINTS or NOT_MEASURED')
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        scaling = self.scaling_endpoints()
+        self.assertEqual(scaling, {}, f'Queries grow with row count (small, large): {scaling}')
+
+    def test_detects_a_missing_prefetch(self):
+        # TaskSerializer's nested submissions without the prefetch: one query per task
+        without_prefetch = lambda view, user_id: Task.objects.filter(assignee_id=user_id).order_by('due_date')
+        with mock.patch.object(UserTasksView, 'tasks_for', without_prefetch):
+            scaling = self.scaling_endpoints()
+        self.assertEqual(list(scaling), ['user-tasks'])
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_results_are_written_and_data_rolled_back(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        output = os.path.join(tmp, 'results.json')
+        call_command('benchmark', '--sizes', '10', '20', '--repeat', '1', '--output', output, stdout=StringIO())
+
+        with open(output) as f:
+            report = json.load(f)
+        results = {(result['name'], result['rows']): result for result in report['results']}
+        self.assertEqual(results[('request.user-tasks', 20)]['queries'], results[('request.user-tasks', 10)]['queries'])
+        self.assertEqual(results[('serializer.TaskSerializer', 20)]['queries'], 0)
+        self.assertGreater(results[('request.case-list', 20)]['peak_memory_bytes'], 0)
+        self.assertFalse(Task.objects.exists())
+
+        out = StringIO()
+        call_command('benchmark', '--sizes', '10', '--repeat', '1', '--only', 'serializer',
+                     '--output', os.path.join(tmp, 'again.json'), '--compare', output, stdout=out)
+        self.assertIn('serializer.CaseSerializer', out.getvalue().split('Compared with')[1])
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        for i in range(30):
+            Case.objects.create(borrower_name=f'Borrower {i}', location='Pune', outstanding_amount='10.00',
+                                visit_status='pending', next_action='Visit', priority='high', assigned_to='agent1')
+
+    def test_gzip_when_brotli_is_not_available(self):
+        with mock.patch('core.middleware.brotli', None):
+            response = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))[0]['borrower_name'], 'Borrower 0')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+    def test_brotli_is_preferred(self):
+        fake = mock.Mock(compress=lambda data, quality: b'br:' + data[:10])
+        with mock.patch('core.middleware.brotli', fake):
+            response = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip, br')
+            gzipped = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertTrue(response.content.startswith(b'br:'))
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+
+    def test_refused_codings_are_not_used(self):
+        fake = mock.Mock(compress=lambda data, quality: b'br:' + data[:10])
+        with mock.patch('core.middleware.brotli', fake):
+            refused = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+            preferred = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip;q=1.0, br;q=0.5')
+            identity = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+            wildcard = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='*, gzip;q=0.5')
+        self.assertEqual(refused['Content-Encoding'], 'gzip')
+        self.assertEqual(preferred['Content-Encoding'], 'gzip')
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(identity.content)[0]['borrower_name'], 'Borrower 0')
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        self.assertEqual(wildcard['Content-Encoding'], 'br')
+
+    def test_weak_etag_still_revalidates(self):
+        response = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip')
+        repeat = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_small_and_uncompressed_responses_are_left_alone(self):
+        self.assertFalse(self.client.get(reverse('case-list')).has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_MIN_SIZE=10 ** 6):
+            response = self.client.get(reverse('case-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streamed_exports_are_gzipped(self):
+        response = self.client.get(reverse('case-export'), {'output': 'ndjson'}, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 30)
+
+
+class FastJSONTests(TestCase):
+    def payloads(self):
+        ist = dt_timezone(timedelta(hours=5, minutes=30))
+        return [
+            {'name': 'Ravi \u0915\u0941\u092e\u093e\u0930', 'remarks': 'line\u2028break\u2029end', 'amount': '15000.50'},
+            [Decimal('15000.50'), Decimal('0.10'), 3.5, 10 ** 18, True, None],
+            {'utc': datetime(2025, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc),
+             'ist': datetime(2025, 1, 2, 3, 4, 5, tzinfo=ist), 'naive': datetime(2025, 1, 2, 3, 4, 5),
+             'date': date(2025, 1, 2), 'time': time(10, 30), 'delta': timedelta(hours=1),
+             'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+            {'big': 2 ** 70, 'nested': {'list': [{'a': 1}], 'empty': {}}},
+        ]
+
+    def test_output_matches_the_stock_renderer(self):
+        make_case = lambda i: Case(borrower_name=f'B\u00f6rrower {i}', location='Pune', outstanding_amount='10.50',
+                                   visit_status='pending', next_action='Visit', priority='high', assigned_to='agent1')
+        Case.objects.bulk_create(make_case(i) for i in range(3))
+        payloads = self.payloads() + [CaseSerializer(Case.objects.all(), many=True).data]
+        for data in payloads:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # Generators and querysets are consumed, so each renderer gets its own
+        self.assertEqual(FastJSONRenderer().render(i for i in range(3)), JSONRenderer().render(i for i in range(3)))
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_float_divergences_are_pinned(self):
+        # Documented on FastJSONRenderer: other spellings of the same value...
+        data = [1e16, 1.5e-7, -2.5e-5, 1.5]
+        self.assertEqual(FastJSONRenderer().render(data), b'[1e16,1.5e-7,-0.000025,1.5]')
+        self.assertEqual(JSONRenderer().render(data), b'[1e+16,1.5e-07,-2.5e-05,1.5]')
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), data)
+        # ...and null for non-finite values, which the stock renderer refuses outright
+        data = {'a': float('nan'), 'b': [float('inf'), -float('inf')], 'c': 1.5}
+        self.assertEqual(FastJSONRenderer().render(data), b'{"a":null,"b":[null,null],"c":1.5}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch('core.renderers.orjson', None), mock.patch('core.parsers.orjson', None):
+            data = self.payloads()[2]
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+            self.assertEqual(FastJSONParser().parse(BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+
+    def test_parser_matches_the_stock_parser(self):
+        for body in [b'{"a": 1, "b": [1.5, "x\\u00e9"], "c": null}', '{"n": "\u0915"}'.encode(), b'[%d]' % 2 ** 70]:
+            self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for body in [b'{"a": ', b'[NaN]']:
+            with self.assertRaises(ParseError) as fast:
+                FastJSONParser().parse(BytesIO(body))
+            with self.assertRaises(ParseError) as stock:
+                JSONParser().parse(BytesIO(body))
+            self.assertEqual(str(fast.exception), str(stock.exception))
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.agent = make_agent()
+        self.other = make_agent('2')
+        self.task, self.moved_task = make_tasks(self.agent, 2, with_documents=1)
+        self.case = Case.objects.create(borrower_name='Ravi', location='Pune', outstanding_amount='10.00',
+                                        visit_status='pending', next_action='Visit', priority='high',
+                                        assigned_to='agent1')
+        self.visit = Visit.objects.create(case=self.case, date='2025-01-01', time='10:00',
+                                          purpose='Collect', status='done')
+
+    def sync(self, agent='agent1', since=None):
+        params = {'agent': agent}
+        if since:
+            params['since'] = since
+        response = self.client.get(reverse('sync'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, data):
+        return {kind: [row['id'] for row in data[kind]] for kind in ('cases', 'visits', 'tasks')}
+
+    def test_first_sync_returns_everything(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertEqual(self.ids(data), {'cases': [self.case.id], 'visits': [self.visit.id],
+                                          'tasks': [self.task.id, self.moved_task.id]})
+        self.assertEqual(len(data['tasks'][0]['submissions']), 1)
+        # Clock-derived fields would change without the row changing
+        self.assertNotIn('time_remaining', data['tasks'][0])
+
+    def test_sparse_fieldset_params_are_ignored(self):
+        token = self.sync()['token']
+        self.client.patch(reverse('case-detail', args=[self.case.id]), {'priority': 'low'},
+                          content_type='application/json')
+        for params in ({'fields': 'updated_at'}, {'omit': 'id'}):
+            response = self.client.get(reverse('sync'), {'agent': 'agent1', 'since': token, **params})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.ids(response.json())['cases'], [self.case.id])
+            self.assertEqual(response.json()['cases'][0]['priority'], 'low')
+
+    def test_delta_has_only_changes_and_removals(self):
+        token = self.sync()['token']
+        self.client.patch(reverse('case-detail', args=[self.case.id]), {'priority': 'low'},
+                          content_type='application/json')
+        visit_id = self.visit.id
+        self.visit.delete()
+        self.moved_task.assignee = self.other
+        self.moved_task.save()
+
+        data = self.sync(since=token)
+        self.assertFalse(data['reset'])
+        self.assertEqual(self.ids(data), {'cases': [self.case.id], 'visits': [], 'tasks': []})
+        self.assertEqual(data['deleted'], {'cases': [], 'visits': [visit_id], 'tasks': [self.moved_task.id]})
+        self.assertEqual(self.ids(self.sync('agent2', since=token))['tasks'], [self.moved_task.id])
+
+        # Nothing changed since: an empty delta
+        quiet = self.sync(since=data['token'])
+        self.assertEqual(self.ids(quiet), {'cases': [], 'visits': [], 'tasks': []})
+        self.assertEqual(quiet['deleted'], {'cases': [], 'visits': [], 'tasks': []})
+
+    def test_submissions_mark_their_task_changed(self):
+        token = self.sync()['token']
+        TaskDocument.objects.create(submission=self.task.submissions.get(), document='task_documents/late.pdf',
+                                    document_type='photo')
+        self.assertEqual(self.ids(self.sync(since=token))['tasks'], [self.task.id])
+
+    def test_reassigned_case_takes_its_visits_along(self):
+        old, new = self.sync()['token'], self.sync('agent2')['token']
+        self.case.assigned_to = 'agent2'
+        self.case.save()
+        self.assertEqual(self.sync(since=old)['deleted']['visits'], [self.visit.id])
+        data = self.sync('agent2', since=new)
+        self.assertEqual(self.ids(data), {'cases': [self.case.id], 'visits': [self.visit.id], 'tasks': []})
+
+    def test_deleting_a_case_buries_its_visits(self):
+        token = self.sync()['token']
+        Case.objects.filter(pk=self.case.pk).delete()
+        data = self.sync(since=token)
+        self.assertEqual(data['deleted'], {'cases': [self.case.id], 'visits': [self.visit.id], 'tasks': []})
+
+    def test_tokens_are_monotonic_and_overlap_recent_writes(self):
+        with override_settings(SYNC_OVERLAP_SECONDS=30):
+            first = self.sync()
+            second = self.sync(since=first['token'])
+        # Rows written within the overlap are sent again rather than risk missing a late commit
+        self.assertEqual(self.ids(second)['cases'], [self.case.id])
+        self.assertGreaterEqual(read_token(second['token']), read_token(first['token']))
+
+    def test_bad_and_expired_tokens(self):
+        self.assertEqual(self.client.get(reverse('sync'), {'agent': 'agent1', 'since': 'forged'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('sync')).status_code, 400)
+        self.assertEqual(self.client.get(reverse('sync'), {'agent': 'nobody'}).status_code, 404)
+        expired = make_token(datetime.now(dt_timezone.utc) - timedelta(days=365))
+        self.assertTrue(self.sync(since=expired)['reset'])
+
+    def test_old_tombstones_are_pruned(self):
+        self.visit.delete()
+        out = StringIO()
+        call_command('prune_tombstones', '--days', '0', stdout=out)
+        self.assertIn('Deleted 1 tombstone(s)', out.getvalue())
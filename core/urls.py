@@ -15,12 +15,13 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
-from .views import home
+from .views import home, MetricsView, SyncView
+from .media import serve_media
 from rest_framework import routers
-from cases.views import CaseViewSet, VisitViewSet
+from cases.views import CaseViewSet, VisitViewSet, CaseListView, VisitListView
+from .async_views import split_reads
 
 router = routers.DefaultRouter()
 router.register(r'cases', CaseViewSet)
@@ -29,10 +30,13 @@ router.register(r'visits', VisitViewSet)
 urlpatterns = [
     path('', home, name='home'),
     path('admin/', admin.site.urls),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('api/users/', include('users.urls')),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    # List reads are async; create on the same URL is still handled by the viewset
+    path('api/cases/', split_reads(CaseListView.as_view(), CaseViewSet.as_view({'post': 'create'})), name='case-list'),
+    path('api/visits/', split_reads(VisitListView.as_view(), VisitViewSet.as_view({'post': 'create'})), name='visit-list'),
     path('api/', include(router.urls)),
+    # Served in every environment; set MEDIA_SENDFILE_BACKEND to hand bodies to the proxy
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
-
-# Add media files URL pattern in development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,4 +1,45 @@
+from django.core import signing
 from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from users.models import UserTable
+from .profiling import registry
+from .sync import changes, read_token
 
 def home(request):
-    return HttpResponse("Welcome to the API! The server is running successfully.") 
\ No newline at end of file
+    return HttpResponse("Welcome to the API! The server is running successfully.") 
+
+
+class MetricsView(APIView):
+    """Request profiling summaries in Prometheus text format, for staff users only"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class SyncView(APIView):
+    """
+    Delta sync for offline clients: ?agent=<username>&since=<token>.
+
+    Returns the agent's cases, visits and tasks changed since the token, the
+    ids deleted or reassigned away under "deleted", and the token for the
+    next call. Leave out `since` for a full download.
+    """
+
+    def get(self, request):
+        agent = request.query_params.get('agent')
+        if not agent:
+            return Response({"error": "Agent parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+        since = None
+        if request.query_params.get('since'):
+            try:
+                since = read_token(request.query_params['since'])
+            except signing.BadSignature:
+                return Response({"error": "Invalid sync token"}, status=status.HTTP_400_BAD_REQUEST)
+        user = get_object_or_404(UserTable.objects.only('id'), username=agent)
+        context = {'request': request, 'format': self.format_kwarg, 'view': self}
+        return Response(changes(agent, user.id, since, context))
@@ -0,0 +1,36 @@
+"""
+Gunicorn settings for the production image.
+
+Everything is driven by environment variables so the same image can run as a
+WSGI service (default) or, with SERVER_INTERFACE=asgi, under uvicorn workers
+for the async views:
+
+    gunicorn -c gunicorn.conf.py
+"""
+import multiprocessing
+import os
+
+interface = os.environ.get('SERVER_INTERFACE', 'wsgi')
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+# Sync workers are CPU bound on serialization: (2 x cores) + 1 is the usual sizing.
+# An ASGI worker multiplexes many slow clients, so one per core is enough.
+default_workers = multiprocessing.cpu_count() * 2 + 1 if interface == 'wsgi' else multiprocessing.cpu_count()
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+
+if interface == 'asgi':
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'core.wsgi:application'
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+errorlog = '-'
@@ -0,0 +1,118 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Subquery
+from django.utils.http import urlencode
+from core.models import Tombstone
+
+
+def get_timeout():
+    return getattr(settings, 'TASK_CACHE_TIMEOUT', 60)
+
+
+def version_key(assignee_id):
+    return f'tasks:version:{assignee_id}'
+
+
+def new_version():
+    # Time based so a version that was evicted can never be reissued and revive old entries
+    return time.time_ns()
+
+
+def get_version(assignee_id):
+    return cache.get_or_set(version_key(assignee_id), new_version, timeout=None)
+
+
+async def aget_version(assignee_id):
+    return await cache.aget_or_set(version_key(assignee_id), new_version, timeout=None)
+
+
+def validators_queryset(assignee_id):
+    # models.py imports this module for invalidate_assignees
+    from .models import Task, UserTable
+    removed = (
+        Tombstone.objects.filter(kind='task', agent__in=UserTable.objects.filter(pk=assignee_id).values('username'))
+        .order_by('-removed_at').values('removed_at')[:1]
+    )
+    return Task.objects.filter(assignee_id=assignee_id).order_by(), {
+        'count': Count('pk'), 'latest': Max('updated_at'), 'removed': Max(Subquery(removed)),
+    }
+
+
+def get_validators(assignee_id):
+    """
+    Row count, latest updated_at and latest tombstone of an assignee's tasks,
+    read from the database in one query. Unlike the cached version, these
+    see writes made by other processes.
+    """
+    queryset, aggregates = validators_queryset(assignee_id)
+    return tuple(queryset.aggregate(**aggregates).values())
+
+
+async def aget_validators(assignee_id):
+    queryset, aggregates = validators_queryset(assignee_id)
+    return tuple((await queryset.aaggregate(**aggregates)).values())
+
+
+def params_digest(params):
+    query = urlencode(sorted((key, value) for key in params for value in params.getlist(key)))
+    return hashlib.md5(query.encode()).hexdigest()
+
+
+def validators_digest(validators):
+    return hashlib.md5(repr(validators).encode()).hexdigest()
+
+
+def response_key(name, assignee_id, params):
+    """
+    Cache key for one read endpoint, assignee and set of query params. It
+    carries the database validators, so it is also the freshness part of
+    the response's ETag; the cached version only adds to it.
+    """
+    try:
+        assignee_id = int(assignee_id)
+    except (TypeError, ValueError):
+        return None
+    validators = validators_digest(get_validators(assignee_id))
+    return f'tasks:{name}:{assignee_id}:{get_version(assignee_id)}:{validators}:{params_digest(params)}'
+
+
+async def aresponse_key(name, assignee_id, params):
+    try:
+        assignee_id = int(assignee_id)
+    except (TypeError, ValueError):
+        return None
+    validators = validators_digest(await aget_validators(assignee_id))
+    return f'tasks:{name}:{assignee_id}:{await aget_version(assignee_id)}:{validators}:{params_digest(params)}'
+
+
+def get_response(key):
+    if key is None:
+        return None
+    return cache.get(key)
+
+
+async def aget_response(key):
+    if key is None:
+        return None
+    return await cache.aget(key)
+
+
+def set_response(key, data):
+    if key is not None:
+        cache.set(key, data, get_timeout())
+
+
+async def aset_response(key, data):
+    if key is not None:
+        await cache.aset(key, data, get_timeout())
+
+
+def invalidate_assignees(*assignee_ids):
+    """Bump the version of each assignee so every cached response for them is skipped"""
+    for assignee_id in {assignee_id for assignee_id in assignee_ids if assignee_id}:
+        try:
+            cache.incr(version_key(assignee_id))
+        except ValueError:
+            cache.set(version_key(assignee_id), new_version(), timeout=None)
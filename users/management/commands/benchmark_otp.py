@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from users.models import PhoneOTP, UserTable
+from users.views import OTPRequestView, OTPVerifyView
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    """Django command to measure the queries and writes of the OTP request/verify flow"""
+
+    help = "Run the OTP request and verify views for an existing user and report per-request query and write counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('phone_number', help='Phone number of an existing user.')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def run(self, view, payload):
+        request = APIRequestFactory().post('/', payload, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = view(request)
+            elapsed = time.perf_counter() - started
+        statements = [query['sql'].lstrip().upper() for query in queries.captured_queries]
+        writes = sum(1 for sql in statements if sql.startswith(WRITE_PREFIXES))
+        return response, len(statements), writes, elapsed
+
+    def handle(self, *args, **options):
+        phone_number = options['phone_number']
+        if not UserTable.objects.filter(phone_number=phone_number).exists():
+            raise CommandError(f"No user found with phone number {phone_number}")
+
+        # The IP throttle is cache based and not what is being measured
+        request_view = OTPRequestView.as_view(throttle_classes=[])
+        verify_view = OTPVerifyView.as_view(throttle_classes=[])
+        totals = {'request': [0, 0, 0.0], 'verify': [0, 0, 0.0]}
+        iterations = options['iterations']
+        # Verifying marks the user verified and consumes their codes; undo it all afterwards
+        with transaction.atomic():
+            # Measure a phone that has had a code before, as most logins are, with its
+            # issue count reset each time so the run never reaches OTP_MAX_ISSUES
+            PhoneOTP.issue(phone_number)
+            for _ in range(iterations):
+                PhoneOTP.objects.filter(phone_number=phone_number).update(issued=0)
+                response, queries, writes, elapsed = self.run(request_view, {'phone_number': phone_number})
+                if response.status_code != 200:
+                    raise CommandError(f"OTP request failed: {response.data}")
+                totals['request'] = [a + b for a, b in zip(totals['request'], (queries, writes, elapsed))]
+                payload = {'phone_number': phone_number, 'otp': response.data['otp']}
+                response, queries, writes, elapsed = self.run(verify_view, payload)
+                if response.status_code != 200:
+                    raise CommandError(f"OTP verification failed: {response.data}")
+                totals['verify'] = [a + b for a, b in zip(totals['verify'], (queries, writes, elapsed))]
+            transaction.set_rollback(True)
+
+        for name, (queries, writes, elapsed) in totals.items():
+            self.stdout.write(
+                f"{name}: {queries / iterations:.1f} queries, {writes / iterations:.1f} writes, "
+                f"{elapsed / iterations * 1000:.2f} ms per request"
+            )
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from users.models import Task
+
+
+class Command(BaseCommand):
+    """Django command to mark every past-due, non-completed task as overdue"""
+
+    help = "Flip past-due pending/in-progress tasks to overdue in one set-based UPDATE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and sweep every INTERVAL seconds (0 sweeps once).')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            swept = Task.sweep_overdue()
+            self.stdout.write(f'Marked {swept} task(s) as overdue')
+            if not interval:
+                break
+            time.sleep(interval)
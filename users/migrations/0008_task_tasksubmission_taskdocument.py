@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_usertable_is_verified_usertable_otp_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('priority', models.CharField(choices=[('high', 'High'), ('medium', 'Medium'), ('low', 'Low')], default='medium', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('overdue', 'Overdue')], default='pending', max_length=15)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('due_date', models.DateTimeField()),
+                ('completed_date', models.DateTimeField(blank=True, null=True)),
+                ('location', models.CharField(blank=True, max_length=255, null=True)),
+                ('tags', models.JSONField(blank=True, null=True)),
+                ('assignee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assigned_tasks', to='users.usertable')),
+                ('assigner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_tasks', to='users.usertable')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('submission_date', models.DateTimeField(auto_now_add=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('submitted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.usertable')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='users.task')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.FileField(upload_to='task_documents/')),
+                ('document_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('upload_date', models.DateTimeField(auto_now_add=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documents', to='users.tasksubmission')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_task_tasksubmission_taskdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress', 'overdue'])), fields=['assignee', 'due_date'], name='task_open_assignee_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['assignee', '-completed_date'], name='task_done_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', 'id'], name='task_due_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_task_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=['due_date'], name='task_sweep_due_idx'),
+        ),
+    ]
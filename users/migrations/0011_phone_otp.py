@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_task_sweep_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhoneOTP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(max_length=15, unique=True)),
+                ('code_hash', models.CharField(max_length=64)),
+                ('expires_at', models.DateTimeField()),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveField(
+            model_name='usertable',
+            name='otp',
+        ),
+        migrations.RemoveField(
+            model_name='usertable',
+            name='otp_created_at',
+        ),
+    ]
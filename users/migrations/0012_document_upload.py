@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_phone_otp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('field', models.CharField(choices=[('aadhaar_file', 'aadhaar_file'), ('pan_file', 'pan_file'), ('police_verification', 'police_verification'), ('empanelment_letter', 'empanelment_letter')], max_length=30)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_uploads', to='users.usertable')),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:44
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_document_upload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskdocument',
+            name='document',
+            field=models.FileField(storage=core.storage.ContentAddressedStorage(), upload_to='task_documents/'),
+        ),
+        migrations.AlterField(
+            model_name='usertable',
+            name='aadhaar_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='documents/aadhaar/'),
+        ),
+        migrations.AlterField(
+            model_name='usertable',
+            name='empanelment_letter',
+            field=models.FileField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='documents/empanelment/'),
+        ),
+        migrations.AlterField(
+            model_name='usertable',
+            name='pan_file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='documents/pan/'),
+        ),
+        migrations.AlterField(
+            model_name='usertable',
+            name='police_verification',
+            field=models.FileField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='documents/police_verification/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_content_addressed_documents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
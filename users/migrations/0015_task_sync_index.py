@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_task_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'updated_at'], name='task_assignee_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:24
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_task_sync_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phoneotp',
+            name='issued',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='phoneotp',
+            name='window_started',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,8 +1,20 @@
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.conf import settings
 from django.contrib.auth.models import User
-import random
+from django.utils.crypto import salted_hmac
+import secrets
 from django.utils import timezone
 from datetime import timedelta
+from .cache import invalidate_assignees
+from core.storage import ContentAddressedStorage
+import uuid
+from pathlib import Path
+
+# Agents re-upload the same ID documents; store each distinct file once
+document_storage = ContentAddressedStorage()
+
+DOCUMENT_FIELDS = ['aadhaar_file', 'pan_file', 'police_verification', 'empanelment_letter']
 
 class UserTable(models.Model):
     # Basic Information
@@ -33,38 +45,119 @@ class UserTable(models.Model):
     languages_known = models.JSONField(null=True, blank=True)  # Will store list of known languages
     
     # Document Uploads
-    aadhaar_file = models.FileField(upload_to='documents/aadhaar/', null=True, blank=True)
-    pan_file = models.FileField(upload_to='documents/pan/', null=True, blank=True)
-    police_verification = models.FileField(upload_to='documents/police_verification/', null=True, blank=True)
-    empanelment_letter = models.FileField(upload_to='documents/empanelment/', null=True, blank=True)
+    aadhaar_file = models.FileField(upload_to='documents/aadhaar/', storage=document_storage, null=True, blank=True)
+    pan_file = models.FileField(upload_to='documents/pan/', storage=document_storage, null=True, blank=True)
+    police_verification = models.FileField(upload_to='documents/police_verification/', storage=document_storage, null=True, blank=True)
+    empanelment_letter = models.FileField(upload_to='documents/empanelment/', storage=document_storage, null=True, blank=True)
     
-    # OTP Authentication
-    otp = models.CharField(max_length=6, null=True, blank=True)
-    otp_created_at = models.DateTimeField(null=True, blank=True)
+    # OTP Authentication (codes themselves live in PhoneOTP)
     is_verified = models.BooleanField(default=False)
     
     def __str__(self):
         return f"{self.username} - {self.first_name} {self.last_name}"
         
     def generate_otp(self):
-        """Generate a 6-digit OTP and save it to the user"""
-        self.otp = ''.join([str(random.randint(0, 9)) for _ in range(6)])
-        self.otp_created_at = timezone.now()
-        self.save()
-        return self.otp
+        """Generate a 6-digit OTP for this user's phone number, or None if it has had too many"""
+        return PhoneOTP.issue(self.phone_number)
         
     def verify_otp(self, otp):
-        """Verify if the provided OTP is valid"""
-        # Check if OTP matches and is not expired (10 minutes validity)
-        if self.otp and self.otp == otp and self.otp_created_at:
-            otp_expiry = self.otp_created_at + timedelta(minutes=10)
-            if timezone.now() <= otp_expiry:
-                self.is_verified = True
-                self.otp = None  # Clear OTP after successful verification
-                self.save()
-                return True
+        """Verify if the provided OTP is valid and mark the user as verified"""
+        if not PhoneOTP.verify(self.phone_number, otp):
+            return False
+        if not self.is_verified:
+            self.is_verified = True
+            self.save(update_fields=['is_verified'])
+        return True
+
+class PhoneOTP(models.Model):
+    """
+    One outstanding OTP per phone number, kept apart from the wide UserTable row.
+
+    Only a keyed hash of the code is stored. Issuing is a single conditional
+    update and a wrong guess a single counter update, so login bursts never
+    lock or rewrite user rows.
+
+    The row also counts the codes issued in the current OTP_ISSUE_WINDOW_SECONDS,
+    so the per-phone limit holds across workers whatever the cache backend.
+    """
+    phone_number = models.CharField(max_length=15, unique=True)
+    code_hash = models.CharField(max_length=64)
+    expires_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    issued = models.PositiveSmallIntegerField(default=0)
+    window_started = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"OTP for {self.phone_number}"
+
+    @staticmethod
+    def hash_code(phone_number, code):
+        return salted_hmac('users.PhoneOTP', f'{phone_number}:{code}', algorithm='sha256').hexdigest()
+
+    @classmethod
+    def issue(cls, phone_number):
+        """A fresh code, or None when OTP_MAX_ISSUES codes were issued within OTP_ISSUE_WINDOW_SECONDS"""
+        code = f'{secrets.randbelow(10 ** 6):06d}'
+        now = timezone.now()
+        ttl = getattr(settings, 'OTP_TTL_SECONDS', 600)
+        limit = getattr(settings, 'OTP_MAX_ISSUES', 5)
+        window = timedelta(seconds=getattr(settings, 'OTP_ISSUE_WINDOW_SECONDS', 3600))
+        values = {
+            'code_hash': cls.hash_code(phone_number, code),
+            'expires_at': now + timedelta(seconds=ttl),
+            'attempts': 0,
+        }
+        # The limit is checked by the UPDATE itself, so concurrent requests can't both slip under it
+        in_window = Q(window_started__gt=now - window)
+        if cls.objects.filter(Q(phone_number=phone_number), ~in_window | Q(issued__lt=limit)).update(
+            issued=Case(When(in_window, then=F('issued') + 1), default=Value(1)),
+            window_started=Case(When(in_window, then=F('window_started')), default=Value(now)),
+            **values,
+        ):
+            return code
+        try:
+            with transaction.atomic():
+                cls.objects.create(phone_number=phone_number, issued=1, window_started=now, **values)
+        except IntegrityError:
+            # The row exists and is over the limit, or a concurrent request just issued a code
+            return None
+        return code
+
+    @classmethod
+    def verify(cls, phone_number, code):
+        """Consume the OTP if it matches; wrong guesses count towards OTP_MAX_ATTEMPTS"""
+        max_attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+        now = timezone.now()
+        live = cls.objects.filter(phone_number=phone_number, expires_at__gte=now, attempts__lt=max_attempts)
+        # A matching code is consumed by the UPDATE itself, so a duplicate submit finds nothing. The row
+        # stays, keeping the issue count and letting the next request be a single UPDATE
+        if live.filter(code_hash=cls.hash_code(phone_number, code)).update(
+            code_hash='', expires_at=now - timedelta(microseconds=1)
+        ):
+            return True
+        live.update(attempts=F('attempts') + 1)
         return False
 
+class DocumentUpload(models.Model):
+    """A resumable, chunked upload of one user document, staged on disk until committed"""
+    FIELD_CHOICES = [(field, field) for field in DOCUMENT_FIELDS]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(UserTable, on_delete=models.CASCADE, related_name='document_uploads')
+    field = models.CharField(max_length=30, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.field} upload for user {self.user_id} ({self.received_bytes}/{self.size})"
+
+    @property
+    def staging_path(self):
+        return Path(getattr(settings, 'DOCUMENT_UPLOAD_STAGING_DIR', settings.BASE_DIR / 'upload_staging')) / f'{self.id}.part'
+
 # Task Management Models (moved from tasks app)
 class Task(models.Model):
     PRIORITY_CHOICES = [
@@ -89,6 +182,37 @@ class Task(models.Model):
     completed_date = models.DateTimeField(null=True, blank=True)
     location = models.CharField(max_length=255, null=True, blank=True)
     tags = models.JSONField(null=True, blank=True)
+    # Also touched when the task's submissions or documents change
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        indexes = [
+            # TaskViewSet ?assignee=&status= filters and due-date ranges
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            # Calendar month ranges and UserTasksView ordering
+            models.Index(fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+            # Taskboard open buckets
+            models.Index(
+                fields=['assignee', 'due_date'],
+                name='task_open_assignee_due_idx',
+                condition=models.Q(status__in=['pending', 'in_progress', 'overdue']),
+            ),
+            # Taskboard "recently completed" list
+            models.Index(
+                fields=['assignee', '-completed_date'],
+                name='task_done_assignee_idx',
+                condition=models.Q(status='completed'),
+            ),
+            # Overdue sweeper only visits tasks that can still become overdue
+            models.Index(
+                fields=['due_date'],
+                name='task_sweep_due_idx',
+                condition=models.Q(status__in=['pending', 'in_progress']),
+            ),
+            # Cursor pagination order of TaskViewSet
+            models.Index(fields=['due_date', 'id'], name='task_due_id_idx'),
+            # Delta sync: an agent's tasks changed since a token
+            models.Index(fields=['assignee', 'updated_at'], name='task_assignee_updated_idx'),
+        ]
     def __str__(self):
         return self.title
     def is_overdue(self):
@@ -99,10 +223,25 @@ class Task(models.Model):
         self.status = 'completed'
         self.completed_date = timezone.now()
         self.save()
-    def save(self, *args, **kwargs):
-        if self.is_overdue():
-            self.status = 'overdue'
-        super().save(*args, **kwargs)
+    @classmethod
+    def sweep_overdue(cls, now=None):
+        """
+        Flip every past-due open task to overdue with a single set-based UPDATE,
+        which also returns the assignees whose caches it made stale.
+        """
+        now = connection.ops.adapt_datetimefield_value(now or timezone.now())
+        qn = connection.ops.quote_name
+        # The ORM can't return rows from an UPDATE; PostgreSQL and SQLite 3.35+ both support RETURNING
+        sql = (
+            f"UPDATE {qn(cls._meta.db_table)} SET {qn('status')} = %s, {qn('updated_at')} = %s "
+            f"WHERE {qn('status')} IN (%s, %s) AND {qn('due_date')} < %s "
+            f"RETURNING {qn('assignee_id')}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, ['overdue', now, 'pending', 'in_progress', now])
+            rows = cursor.fetchall()
+        invalidate_assignees(*(assignee_id for assignee_id, in rows))
+        return len(rows)
 
 class TaskSubmission(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='submissions')
@@ -114,7 +253,7 @@ class TaskSubmission(models.Model):
 
 class TaskDocument(models.Model):
     submission = models.ForeignKey(TaskSubmission, on_delete=models.CASCADE, related_name='documents')
-    document = models.FileField(upload_to='task_documents/')
+    document = models.FileField(upload_to='task_documents/', storage=document_storage)
     document_type = models.CharField(max_length=100, null=True, blank=True)
     upload_date = models.DateTimeField(auto_now_add=True)
     def __str__(self):
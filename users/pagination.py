@@ -0,0 +1,108 @@
+import json
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (due_date, id).
+
+    Each page is a single indexed range scan from the previous cursor, so deep
+    pages cost the same as the first one, unlike OFFSET based pagination.
+
+    DRF's cursor only compares the first ordering field and steps over ties
+    with an offset capped at offset_cutoff, which loops on orderings such as
+    ?ordering=priority. Here every ordering ends in id, and the cursor holds
+    the values of all ordering fields, compared as a tuple.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('due_date', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            value = getattr(instance, field.lstrip('-'))
+            values.append(None if value is None else str(value))
+        return json.dumps(values)
+
+    def position_filter(self, position, reverse):
+        """Rows after `position` in the (possibly reversed) ordering, as (a > x) | (a = x & b > y) | ..."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            # A cursor from before tuple positions, or a tampered one
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if reverse != field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset, with the single-field position filter replaced
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.position_filter(current_position, self.cursor.reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
@@ -1,8 +1,12 @@
+import re
 from rest_framework import serializers
+from django.conf import settings
+from django.db import transaction
 from .models import UserTable
-from django.utils import timezone
-from datetime import timedelta
-from .models import Task, TaskSubmission, TaskDocument
+from .models import Task, TaskSubmission, TaskDocument, DocumentUpload
+from .taskboard import DUE_CATEGORIES, TimeWindow
+from .cache import invalidate_assignees
+from core.fieldsets import SparseFieldsetMixin
 
 class MetadataSerializer(serializers.Serializer):
     field_recovery_experience_years = serializers.IntegerField(required=True)
@@ -68,29 +72,49 @@ class DocumentUploadSerializer(serializers.Serializer):
             raise serializers.ValidationError("At least one document must be uploaded")
         return attrs
 
+class DocumentUploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DocumentUpload
+        fields = ('id', 'field', 'filename', 'size', 'sha256', 'received_bytes', 'created_at')
+        read_only_fields = ('id', 'received_bytes', 'created_at')
+        # Checked when the upload is committed
+        extra_kwargs = {'sha256': {'required': True, 'allow_blank': False}}
+    
+    def validate_size(self, value):
+        max_size = getattr(settings, 'DOCUMENT_UPLOAD_MAX_SIZE', 50 * 1024 * 1024)
+        if not 0 < value <= max_size:
+            raise serializers.ValidationError(f"Size must be between 1 and {max_size} bytes")
+        return value
+    
+    def validate_sha256(self, value):
+        if not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError("Must be a hex encoded SHA-256 digest")
+        return value.lower()
+
 class OTPRequestSerializer(serializers.Serializer):
     phone_number = serializers.CharField(max_length=15)
     
-    def validate_phone_number(self, value):
-        """Validate that the phone number exists in the database"""
-        try:
-            UserTable.objects.get(phone_number=value)
-        except UserTable.DoesNotExist:
-            raise serializers.ValidationError("No user found with this phone number")
-        return value
+    def validate(self, attrs):
+        """Validate that the phone number exists and carry the user on to the view"""
+        user = UserTable.objects.only('id', 'phone_number').filter(phone_number=attrs['phone_number']).first()
+        if user is None:
+            raise serializers.ValidationError({"phone_number": ["No user found with this phone number"]})
+        attrs['user'] = user
+        return attrs
 
 class OTPVerifySerializer(serializers.Serializer):
+    # Columns returned by OTPVerifyView; the wide profile and document columns are never loaded
+    USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'type', 'phone_number', 'email', 'is_verified')
     phone_number = serializers.CharField(max_length=15)
     otp = serializers.CharField(max_length=6)
     
     def validate(self, attrs):
-        """Validate that the phone number exists"""
-        phone_number = attrs.get('phone_number')
-        try:
-            UserTable.objects.get(phone_number=phone_number)
-        except UserTable.DoesNotExist:
+        """Validate that the phone number exists and carry the user on to the view"""
+        user = UserTable.objects.only(*self.USER_FIELDS).filter(phone_number=attrs['phone_number']).first()
+        if user is None:
             raise serializers.ValidationError("No user found with this phone number")
-        return attrs 
+        attrs['user'] = user
+        return attrs
 
 # Task Management Serializers (moved from tasks app)
 
@@ -130,10 +154,14 @@ class TaskSubmissionSerializer(serializers.ModelSerializer):
         task.mark_as_completed()
         return submission
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     submissions = TaskSubmissionSerializer(many=True, read_only=True)
     time_remaining = serializers.SerializerMethodField()
     due_category = serializers.SerializerMethodField()
+    field_dependencies = {
+        'time_remaining': ['status', 'due_date'],
+        'due_category': ['status', 'due_date'],
+    }
     class Meta:
         model = Task
         fields = [
@@ -143,30 +171,97 @@ class TaskSerializer(serializers.ModelSerializer):
             'time_remaining', 'due_category'
         ]
         read_only_fields = ['created_date', 'completed_date']
+    def get_time_window(self):
+        # The context dict is shared by every row, so the window is built once per response
+        if 'time_window' not in self.context:
+            self.context['time_window'] = TimeWindow()
+        return self.context['time_window']
     def get_time_remaining(self, obj):
-        if obj.status == 'completed':
-            return "Completed"
-        now = timezone.now()
-        if obj.due_date < now:
-            return "Overdue"
-        delta = obj.due_date - now
-        days = delta.days
-        hours = delta.seconds // 3600
-        minutes = (delta.seconds % 3600) // 60
-        return f"{days} days, {hours} hours, {minutes} minutes"
+        return self.get_time_window().time_remaining(obj)
     def get_due_category(self, obj):
-        if obj.status == 'completed':
-            return "Completed"
-        now = timezone.now()
-        today_end = timezone.now().replace(hour=23, minute=59, second=59)
-        this_week_end = now + timedelta(days=(6 - now.weekday()))
-        this_week_end = this_week_end.replace(hour=23, minute=59, second=59)
-        if obj.due_date <= today_end:
-            return "Due Today"
-        elif obj.due_date <= this_week_end:
-            return "Due This Week"
+        rank = getattr(obj, 'due_rank', None)
+        if rank is None:
+            rank = self.get_time_window().due_rank(obj)
+        return DUE_CATEGORIES[rank][1]
+
+class TaskSlimSerializer(TaskSerializer):
+    """List representation of a task without the nested submissions"""
+    class Meta(TaskSerializer.Meta):
+        fields = [
+            'id', 'title', 'description', 'assignee', 'assigner', 'priority', 'status',
+            'created_date', 'due_date', 'completed_date', 'location', 'tags',
+            'time_remaining', 'due_category'
+        ]
+
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """One task of a bulk assignment; user ids are checked in bulk by the parent"""
+    assignee = serializers.IntegerField()
+    assigner = serializers.IntegerField(required=False, allow_null=True)
+    class Meta:
+        model = Task
+        fields = [
+            'title', 'description', 'assignee', 'assigner', 'priority',
+            'status', 'due_date', 'location', 'tags'
+        ]
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    MAX_TASKS = 1000
+    tasks = serializers.ListField(child=serializers.DictField(), required=False)
+    template = serializers.DictField(required=False)
+    assignees = serializers.ListField(child=serializers.IntegerField(), required=False)
+    def validate(self, attrs):
+        """Validate every task and resolve all referenced users with a single query"""
+        if 'tasks' in attrs:
+            items = attrs['tasks']
+        elif 'template' in attrs and 'assignees' in attrs:
+            items = [{**attrs['template'], 'assignee': assignee} for assignee in attrs['assignees']]
         else:
-            return "Upcoming"
+            raise serializers.ValidationError("Provide either 'tasks' or 'template' with 'assignees'")
+        if not items:
+            raise serializers.ValidationError("At least one task is required")
+        if len(items) > self.MAX_TASKS:
+            raise serializers.ValidationError(f"At most {self.MAX_TASKS} tasks can be created at once")
+
+        errors = {}
+        validated = {}
+        for index, item in enumerate(items):
+            item_serializer = TaskBulkItemSerializer(data=item)
+            if item_serializer.is_valid():
+                validated[index] = item_serializer.validated_data
+            else:
+                errors[index] = item_serializer.errors
+
+        user_ids = set()
+        for data in validated.values():
+            user_ids.add(data['assignee'])
+            if data.get('assigner'):
+                user_ids.add(data['assigner'])
+        known_ids = set(UserTable.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        for index, data in validated.items():
+            for field in ('assignee', 'assigner'):
+                if data.get(field) and data[field] not in known_ids:
+                    errors.setdefault(index, {})[field] = [f"User {data[field]} not found"]
+
+        if errors:
+            # Same shape as a ListSerializer: one entry per submitted task, empty when valid
+            raise serializers.ValidationError({
+                "errors": [errors.get(index, {}) for index in range(len(items))]
+            })
+        attrs['items'] = [validated[index] for index in range(len(items))]
+        return attrs
+    def create(self, validated_data):
+        tasks = []
+        for data in validated_data['items']:
+            data = dict(data)
+            tasks.append(Task(
+                assignee_id=data.pop('assignee'),
+                assigner_id=data.pop('assigner', None),
+                **data
+            ))
+        with transaction.atomic():
+            created = Task.objects.bulk_create(tasks, batch_size=500)
+        invalidate_assignees(*{task.assignee_id for task in created})
+        return created
 
 class TaskCalendarSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,12 +1,9 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Task, TaskSubmission
-
-@receiver(pre_save, sender=Task)
-def update_task_status(sender, instance, **kwargs):
-    if instance.status != 'completed' and instance.due_date < timezone.now():
-        instance.status = 'overdue'
+from core.models import Tombstone
+from .cache import invalidate_assignees
+from .models import Task, TaskSubmission, TaskDocument, UserTable
 
 @receiver(post_save, sender=TaskSubmission)
 def mark_task_completed(sender, instance, created, **kwargs):
@@ -14,4 +11,72 @@ def mark_task_completed(sender, instance, created, **kwargs):
         task = instance.task
         task.status = 'completed'
         task.completed_date = timezone.now()
-        task.save(update_fields=['status', 'completed_date']) 
\ No newline at end of file
+        task.save(update_fields=['status', 'completed_date', 'updated_at'])
+
+# Cached task responses are versioned per assignee; any write that shows up in
+# them bumps that assignee's version. Submission and document writes also
+# touch the task's updated_at, which list ETags are derived from.
+
+@receiver(pre_save, sender=Task)
+def remember_previous_assignee(sender, instance, update_fields=None, **kwargs):
+    instance._previous_assignee_id = None
+    if instance.pk and (update_fields is None or 'assignee' in update_fields):
+        instance._previous_assignee_id = (
+            Task.objects.filter(pk=instance.pk).values_list('assignee_id', flat=True).first()
+        )
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_cache(sender, instance, **kwargs):
+    invalidate_assignees(instance.assignee_id, getattr(instance, '_previous_assignee_id', None))
+
+def touch_task(task_id):
+    Task.objects.filter(pk=task_id).update(updated_at=timezone.now())
+
+def cached_relation(instance, name):
+    field = instance._meta.get_field(name)
+    return getattr(instance, name) if field.is_cached(instance) else None
+
+@receiver(post_save, sender=TaskSubmission)
+@receiver(post_delete, sender=TaskSubmission)
+def invalidate_submission_cache(sender, instance, created=False, **kwargs):
+    if not created:
+        # A new submission already saved its task in mark_task_completed
+        touch_task(instance.task_id)
+    task = cached_relation(instance, 'task')
+    if task is None:
+        task = Task.objects.filter(pk=instance.task_id).only('assignee_id').first()
+    if task is not None:
+        invalidate_assignees(task.assignee_id)
+
+@receiver(post_save, sender=TaskDocument)
+@receiver(post_delete, sender=TaskDocument)
+def invalidate_document_cache(sender, instance, **kwargs):
+    submission = cached_relation(instance, 'submission')
+    task = cached_relation(submission, 'task') if submission is not None else None
+    if task is None:
+        task = Task.objects.filter(submissions=instance.submission_id).only('assignee_id').first()
+    if task is not None:
+        touch_task(task.pk)
+        invalidate_assignees(task.assignee_id)
+
+# Tasks that leave an agent, deleted or reassigned, leave a tombstone for the
+# sync endpoint.
+
+def username_of(user_id):
+    return UserTable.objects.filter(pk=user_id).values_list('username', flat=True).first()
+
+@receiver(post_save, sender=Task)
+def bury_reassigned_task(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_assignee_id', None)
+    if previous and previous != instance.assignee_id:
+        Tombstone.bury('task', username_of(previous), [instance.pk])
+
+@receiver(pre_delete, sender=Task)
+def bury_deleted_task(sender, instance, **kwargs):
+    assignee = cached_relation(instance, 'assignee')
+    Tombstone.bury('task', assignee.username if assignee else username_of(instance.assignee_id), [instance.pk])
+
+@receiver(post_delete, sender=UserTable)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_assignees(instance.pk)
@@ -0,0 +1,62 @@
+from datetime import datetime
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Task
+
+CALENDAR_FIELDS = ['id', 'title', 'due_date', 'status', 'priority']
+
+
+def month_range(year, month):
+    """
+    Half-open [start, end) bounds of a month in the current time zone.
+
+    Comparing due_date against plain bounds keeps the (assignee, due_date)
+    index usable, where __year/__month wrap the column in a function.
+    Raises ValueError for an impossible year or month.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def calendar_queryset(assignee_id, bounds=None):
+    queryset = Task.objects.filter(assignee_id=assignee_id)
+    if bounds:
+        start, end = bounds
+        queryset = queryset.filter(due_date__gte=start, due_date__lt=end)
+    return queryset.annotate(day=TruncDate('due_date'))
+
+
+def task_rows(assignee_id, bounds=None):
+    """The calendar fields of each task plus its local due day, in due-date order"""
+    return calendar_queryset(assignee_id, bounds).order_by('due_date').values(*CALENDAR_FIELDS, 'day')
+
+
+def summary_rows(assignee_id, bounds=None):
+    """One row per (day, status, priority) with its task count, grouped by the database"""
+    return (
+        calendar_queryset(assignee_id, bounds)
+        .values('day', 'status', 'priority')
+        .annotate(count=Count('id'))
+        .order_by('day', 'status', 'priority')
+    )
+
+
+def group_by_day(rows, items):
+    """Group serialized tasks under the day the database truncated their due date to"""
+    calendar = {}
+    for row, item in zip(rows, items):
+        calendar.setdefault(row['day'].isoformat(), []).append(item)
+    return calendar
+
+
+def summarize(rows):
+    """{day: {"total": n, "status": {...}, "priority": {...}}} from summary_rows()"""
+    calendar = {}
+    for row in rows:
+        day = calendar.setdefault(row['day'].isoformat(), {"total": 0, "status": {}, "priority": {}})
+        day["total"] += row['count']
+        day["status"][row['status']] = day["status"].get(row['status'], 0) + row['count']
+        day["priority"][row['priority']] = day["priority"].get(row['priority'], 0) + row['count']
+    return calendar
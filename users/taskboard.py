@@ -0,0 +1,145 @@
+import asyncio
+from datetime import timedelta
+from django.db.models import Case, IntegerField, Value, When, aprefetch_related_objects, prefetch_related_objects
+from django.utils import timezone
+from .models import Task
+
+OPEN_STATUSES = ['pending', 'in_progress', 'overdue']
+COMPLETED_LIMIT = 10
+# (key, label) in due_rank order; keys are the ?due_category= values and taskboard buckets
+DUE_CATEGORIES = [
+    ('due_today', 'Due Today'),
+    ('due_this_week', 'Due This Week'),
+    ('upcoming', 'Upcoming'),
+    ('completed', 'Completed'),
+]
+DUE_RANKS = {key: rank for rank, (key, _) in enumerate(DUE_CATEGORIES)}
+
+
+def get_due_boundaries(now=None):
+    """Return the (today_end, week_end) cut-offs used to bucket tasks by due date"""
+    now = now or timezone.now()
+    today_end = now.replace(hour=23, minute=59, second=59)
+    week_end = now + timedelta(days=(6 - now.weekday()))
+    week_end = week_end.replace(hour=23, minute=59, second=59)
+    return today_end, week_end
+
+
+class TimeWindow:
+    """
+    One "now" and the due-date cut-offs derived from it.
+
+    Built once per request and handed to serializers through their context,
+    so every row of a response is categorised against the same instant.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or timezone.now()
+        self.today_end, self.week_end = get_due_boundaries(self.now)
+
+    def due_rank(self, task):
+        if task.status == 'completed':
+            return DUE_RANKS['completed']
+        if task.due_date <= self.today_end:
+            return DUE_RANKS['due_today']
+        if task.due_date <= self.week_end:
+            return DUE_RANKS['due_this_week']
+        return DUE_RANKS['upcoming']
+
+    def due_rank_expression(self):
+        """The same ranking as due_rank(), as a database expression"""
+        return Case(
+            When(status='completed', then=Value(DUE_RANKS['completed'])),
+            When(due_date__lte=self.today_end, then=Value(DUE_RANKS['due_today'])),
+            When(due_date__lte=self.week_end, then=Value(DUE_RANKS['due_this_week'])),
+            default=Value(DUE_RANKS['upcoming']),
+            output_field=IntegerField(),
+        )
+
+    def validity(self, fields=None):
+        """
+        The part of "now" a task representation depends on: the minute when
+        time_remaining is included, otherwise the day the due-category
+        cut-offs are derived from.
+        """
+        if fields is None or 'time_remaining' in fields:
+            return self.now.strftime('%Y-%m-%dT%H:%M')
+        return self.now.date().isoformat()
+
+    def time_remaining(self, task):
+        if task.status == 'completed':
+            return "Completed"
+        if task.due_date < self.now:
+            return "Overdue"
+        delta = task.due_date - self.now
+        hours = delta.seconds // 3600
+        minutes = (delta.seconds % 3600) // 60
+        return f"{delta.days} days, {hours} hours, {minutes} minutes"
+
+
+def annotate_due_rank(queryset, window):
+    return queryset.annotate(due_rank=window.due_rank_expression())
+
+
+def open_tasks_queryset(assignee, window=None):
+    """Open tasks annotated with due_rank; overdue tasks only show up in the due-today bucket"""
+    window = window or TimeWindow()
+    queryset = Task.objects.filter(assignee=assignee, status__in=OPEN_STATUSES)
+    queryset = queryset.exclude(status='overdue', due_date__gt=window.today_end)
+    return annotate_due_rank(queryset, window).order_by('due_date')
+
+
+def completed_tasks_queryset(assignee):
+    return Task.objects.filter(assignee=assignee, status='completed').order_by('-completed_date')[:COMPLETED_LIMIT]
+
+
+def narrow(queryset, columns=None):
+    return queryset.only(*columns) if columns else queryset
+
+
+def build_taskboard(assignee, window=None, columns=None, prefetch=True):
+    """
+    Fetch an assignee's board with a fixed number of queries.
+
+    Open tasks come back in one query ordered by due date and ranked by the
+    database, the latest completed tasks in a second one, and
+    submissions/documents are prefetched for both lists together so the
+    nested serializer never goes back to the database.
+    """
+    window = window or TimeWindow()
+    open_tasks = list(narrow(open_tasks_queryset(assignee, window), columns))
+    completed = list(narrow(completed_tasks_queryset(assignee), columns))
+    if prefetch:
+        prefetch_related_objects(open_tasks + completed, 'submissions__documents')
+    return bucket_tasks(open_tasks, completed)
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def abuild_taskboard(assignee, window=None, columns=None, prefetch=True):
+    """
+    build_taskboard for async views.
+
+    The open and completed lists don't depend on each other, so both queries
+    are awaited together before the shared prefetch. `columns` narrows both
+    with .only() and `prefetch` can skip the submissions when not serialized.
+    """
+    window = window or TimeWindow()
+    open_tasks, completed = await asyncio.gather(
+        alist(narrow(open_tasks_queryset(assignee, window), columns)),
+        alist(narrow(completed_tasks_queryset(assignee), columns)),
+    )
+    if prefetch:
+        await aprefetch_related_objects(open_tasks + completed, 'submissions__documents')
+    return bucket_tasks(open_tasks, completed)
+
+
+def bucket_tasks(open_tasks, completed):
+    """Group due_rank-annotated open tasks, keeping their due-date order"""
+    board = {key: [] for key, _ in DUE_CATEGORIES}
+    for task in open_tasks:
+        board[DUE_CATEGORIES[task.due_rank][0]].append(task)
+    board["completed"] = completed
+    return board
@@ -1,3 +1,716 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.storage import ContentAddressedStorage
+from .throttling import OTPIPRateThrottle
+from .uploads import UploadError, append_chunk
+from .models import UserTable, PhoneOTP, DocumentUpload, Task, TaskSubmission, TaskDocument
 
-# Create your tests here.
+
+def make_agent(suffix='1'):
+    return UserTable.objects.create(
+        username=f'agent{suffix}',
+        phone_number=f'98765000{suffix}',
+        email=f'agent{suffix}@example.com',
+        type='agent',
+    )
+
+
+def make_tasks(assignee, count, status='pending', days=1, with_documents=2):
+    tasks = []
+    for i in range(count):
+        task = Task.objects.create(
+            title=f'Task {i}',
+            description='Recovery visit',
+            assignee=assignee,
+            status=status,
+            due_date=timezone.now() + timedelta(days=days, minutes=i),
+        )
+        if with_documents:
+            submission = TaskSubmission.objects.create(task=task, submitted_by=assignee, notes='done')
+            for j in range(with_documents):
+                TaskDocument.objects.create(
+                    submission=submission,
+                    document=f'task_documents/doc_{i}_{j}.pdf',
+                    document_type='photo',
+                )
+            # Submitting marks the task completed; restore the requested status
+            Task.objects.filter(pk=task.pk).update(status=status, completed_date=timezone.now())
+        tasks.append(task)
+    return tasks
+
+
+class TaskboardViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        self.url = reverse('taskboard')
+
+    def test_buckets_match_due_categories(self):
+        now = timezone.now()
+        overdue = Task.objects.create(title='late', description='', assignee=self.agent,
+                                      due_date=now - timedelta(days=2))
+        upcoming = Task.objects.create(title='later', description='', assignee=self.agent,
+                                       due_date=now + timedelta(days=30))
+        done = Task.objects.create(title='done', description='', assignee=self.agent,
+                                   due_date=now + timedelta(days=3))
+        done.mark_as_completed()
+
+        response = self.client.get(self.url, {'assignee': self.agent.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.data['due_today']], [overdue.id])
+        self.assertEqual([t['id'] for t in response.data['upcoming']], [upcoming.id])
+        self.assertEqual([t['id'] for t in response.data['completed']], [done.id])
+        for bucket, label in [('due_today', 'Due Today'), ('upcoming', 'Upcoming'), ('completed', 'Completed')]:
+            self.assertEqual(response.data[bucket][0]['due_category'], label)
+
+    def test_query_count_is_constant(self):
+        make_tasks(self.agent, 2, status='pending', days=0)
+        make_tasks(self.agent, 2, status='completed')
+        with self.assertNumQueries(6) as small:
+            self.client.get(self.url, {'assignee': self.agent.id})
+
+        make_tasks(self.agent, 40, status='pending', days=0)
+        make_tasks(self.agent, 40, status='pending', days=20)
+        make_tasks(self.agent, 20, status='completed')
+        with self.assertNumQueries(len(small.captured_queries)):
+            response = self.client.get(self.url, {'assignee': self.agent.id})
+        self.assertEqual(len(response.data['completed']), 10)
+        self.assertEqual(len(response.data['upcoming']), 40)
+        self.assertEqual(len(response.data['upcoming'][0]['submissions'][0]['documents']), 2)
+
+    def test_requires_assignee(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_served_asynchronously(self):
+        await Task.objects.acreate(title='soon', description='', assignee=self.agent,
+                                   due_date=timezone.now() + timedelta(days=30))
+        response = await self.async_client.get(self.url, {'assignee': self.agent.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['title'] for t in response.json()['upcoming']], ['soon'])
+
+        missing = await self.async_client.get(self.url, {'assignee': self.agent.id + 100})
+        self.assertEqual(missing.status_code, 404)
+        calendar = await self.async_client.get(reverse('calendar'), {'assignee': self.agent.id})
+        self.assertEqual(len(calendar.json()), 1)
+
+
+class TaskViewSetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.agent = make_agent()
+        make_tasks(self.agent, 7, days=3)
+        self.url = reverse('task-list')
+
+    def test_cursor_pages_cover_every_task_once(self):
+        seen = []
+        response = self.client.get(self.url, {'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(t['id'] for t in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, list(Task.objects.order_by('due_date', 'id').values_list('id', flat=True)))
+
+    def walk(self, response, link='next'):
+        """Follow `link` from `response` to the end; returns the ids seen and the last response"""
+        seen = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen.extend(t['id'] for t in response.data['results'])
+            if not response.data[link]:
+                return seen, response
+            response = self.client.get(response.data[link])
+
+    def test_cursor_pages_through_more_ties_than_the_offset_cutoff(self):
+        due = timezone.now() + timedelta(days=5)
+        Task.objects.bulk_create(
+            Task(title=f'Tie {i}', description='', assignee=self.agent, priority='high', due_date=due)
+            for i in range(1100)
+        )
+        expected = set(Task.objects.values_list('id', flat=True))
+        for ordering in ['priority', '-priority', 'status', 'due_rank', '-due_date']:
+            seen, last = self.walk(self.client.get(self.url, {'ordering': ordering, 'page_size': 500, 'view': 'slim'}))
+            self.assertEqual(len(seen), len(set(seen)), ordering)
+            self.assertEqual(set(seen), expected, ordering)
+            # And back again from the last page
+            back, _ = self.walk(self.client.get(last.data['previous']), link='previous')
+            self.assertEqual(len(back) + len(last.data['results']), len(expected), ordering)
+
+    def test_slim_view_skips_submissions(self):
+        # The ETag aggregate, then the page
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'view': 'slim'})
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertNotIn('submissions', response.data['results'][0])
+        self.assertIn('due_category', response.data['results'][0])
+
+    def test_full_view_prefetches_submissions(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['results'][0]['submissions']), 1)
+
+
+class DueCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        now = timezone.now()
+        self.today = Task.objects.create(title='late', description='', assignee=self.agent,
+                                         due_date=now - timedelta(days=1))
+        self.later = Task.objects.create(title='later', description='', assignee=self.agent,
+                                         due_date=now + timedelta(days=30))
+        self.done = Task.objects.create(title='done', description='', assignee=self.agent,
+                                        due_date=now - timedelta(days=2), status='completed')
+
+    def test_due_category_is_filtered_and_sorted_in_the_database(self):
+        url = reverse('task-list')
+        for category, expected in [('due_today', [self.today.id]), ('upcoming', [self.later.id]),
+                                   ('completed', [self.done.id])]:
+            response = self.client.get(url, {'due_category': category, 'view': 'slim'})
+            self.assertEqual([t['id'] for t in response.data['results']], expected)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'ordering': 'due_rank', 'view': 'slim'})
+        self.assertIn('CASE WHEN', queries.captured_queries[-1]['sql'])
+        self.assertEqual([t['due_category'] for t in response.data['results']], ['Due Today', 'Upcoming', 'Completed'])
+
+    def test_one_now_per_response(self):
+        make_tasks(self.agent, 20, days=2, with_documents=0)
+        with mock.patch('django.utils.timezone.now', wraps=timezone.now) as now:
+            response = self.client.get(reverse('user-tasks', args=[self.agent.username]))
+        self.assertEqual(len(response.data), 23)
+        self.assertEqual(now.call_count, 1)
+
+
+class TaskCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        self.url = reverse('calendar')
+        tz = timezone.get_current_timezone()
+        for due, status, priority in [
+            (datetime(2025, 1, 31, 23, 30), 'pending', 'high'),
+            (datetime(2025, 2, 1, 0, 0), 'pending', 'high'),
+            (datetime(2025, 2, 1, 18, 0), 'completed', 'low'),
+            (datetime(2025, 2, 28, 23, 59, 59), 'overdue', 'high'),
+            (datetime(2025, 3, 1, 0, 0), 'pending', 'medium'),
+        ]:
+            Task.objects.create(title=f'{due:%d %b}', description='', assignee=self.agent,
+                                due_date=timezone.make_aware(due, tz), status=status, priority=priority)
+
+    def test_month_uses_half_open_range_grouped_by_day(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'assignee': self.agent.id, 'year': 2025, 'month': 2})
+        self.assertEqual(list(response.data), ['2025-02-01', '2025-02-28'])
+        self.assertEqual([t['title'] for t in response.data['2025-02-01']], ['01 Feb', '01 Feb'])
+        tasks_sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('strftime', tasks_sql)
+        self.assertNotIn('EXTRACT', tasks_sql)
+
+    def test_summary_returns_counts_only(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'assignee': self.agent.id, 'year': 2025, 'month': 2, 'summary': 1})
+        self.assertEqual(response.data, {
+            '2025-02-01': {'total': 2, 'status': {'completed': 1, 'pending': 1}, 'priority': {'high': 1, 'low': 1}},
+            '2025-02-28': {'total': 1, 'status': {'overdue': 1}, 'priority': {'high': 1}},
+        })
+
+    def test_rejects_impossible_months(self):
+        response = self.client.get(self.url, {'assignee': self.agent.id, 'year': 2025, 'month': 13})
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        make_tasks(self.agent, 3, days=0)
+
+    def test_task_list_skips_unrequested_columns_and_prefetches(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task-list'), {'fields': 'id,title,due_category', 'page_size': 2})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('description', queries.captured_queries[-1]['sql'])
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'due_category'})
+        # The cursor still works: due_date is loaded for the paginator even though it isn't returned
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+    def test_nested_submissions_are_kept_when_requested(self):
+        response = self.client.get(reverse('user-tasks', args=[self.agent.username]), {'fields': 'id,submissions'})
+        self.assertEqual(set(response.data[0]), {'id', 'submissions'})
+        self.assertIn('documents', response.data[0]['submissions'][0])
+
+    def test_taskboard_and_writes(self):
+        response = self.client.get(reverse('taskboard'), {'assignee': self.agent.id, 'omit': 'submissions,description'})
+        self.assertNotIn('submissions', response.data['due_today'][0])
+        self.assertIn('time_remaining', response.data['due_today'][0])
+
+        data = {'title': 'New', 'description': 'Visit', 'assignee': self.agent.id,
+                'due_date': timezone.now() + timedelta(days=1)}
+        response = self.client.post(reverse('task-list') + '?fields=id', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.get(pk=response.data['id']).description, 'Visit')
+
+
+class OverdueSweepTests(TestCase):
+    def setUp(self):
+        self.agent = make_agent()
+        now = timezone.now()
+        self.late = Task.objects.create(title='late', description='', assignee=self.agent,
+                                        status='in_progress', due_date=now - timedelta(hours=1))
+        self.future = Task.objects.create(title='future', description='', assignee=self.agent,
+                                          due_date=now + timedelta(days=1))
+        self.done = Task.objects.create(title='done', description='', assignee=self.agent,
+                                        status='completed', due_date=now - timedelta(days=1))
+
+    def test_saving_does_not_compute_overdue(self):
+        self.late.refresh_from_db()
+        self.assertEqual(self.late.status, 'in_progress')
+
+    def test_sweep_flips_only_past_due_open_tasks(self):
+        out = StringIO()
+        with self.assertNumQueries(1):  # UPDATE ... RETURNING assignee_id
+            call_command('sweep_overdue_tasks', stdout=out)
+        self.assertIn('Marked 1 task(s) as overdue', out.getvalue())
+        statuses = dict(Task.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {'late': 'overdue', 'future': 'pending', 'done': 'completed'})
+        # Stamped like an ORM write, so delta sync and the ETags pick it up
+        self.assertGreater(Task.objects.get(pk=self.late.pk).updated_at, self.late.updated_at)
+
+
+class TaskBulkCreateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('task-bulk')
+        self.supervisor = make_agent('0')
+        self.template = {
+            'title': 'Collect EMI',
+            'description': 'Visit borrower',
+            'assigner': self.supervisor.id,
+            'priority': 'high',
+            'due_date': (timezone.now() + timedelta(days=2)).isoformat(),
+        }
+
+    def assignment(self, count):
+        agents = [make_agent(f'{count}{i:03d}') for i in range(count)]
+        return {'template': self.template, 'assignees': [a.id for a in agents]}
+
+    def test_template_fans_out_with_constant_queries(self):
+        payload = self.assignment(3)
+        with self.assertNumQueries(4) as few:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        payload = self.assignment(60)
+        with self.assertNumQueries(len(few.captured_queries)):
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.data['created'], 60)
+        self.assertEqual(Task.objects.filter(title='Collect EMI', assigner=self.supervisor).count(), 63)
+
+    def test_invalid_items_are_reported_and_nothing_is_created(self):
+        agent = make_agent('9')
+        payload = {'tasks': [
+            {**self.template, 'assignee': agent.id},
+            {**self.template, 'assignee': 999999},
+            {**self.template, 'assignee': agent.id, 'priority': 'urgent'},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('assignee', errors[1])
+        self.assertIn('priority', errors[2])
+        self.assertFalse(Task.objects.exists())
+
+
+class TaskResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        self.task = make_tasks(self.agent, 1, days=0)[0]
+
+    def test_repeat_reads_are_served_from_cache(self):
+        # Only the database validators are read; user-tasks also resolves the username
+        requests = [
+            (reverse('taskboard'), {'assignee': self.agent.id}, 1),
+            (reverse('calendar'), {'assignee': self.agent.id}, 1),
+            (reverse('user-tasks', args=[self.agent.username]), {}, 2),
+        ]
+        for url, params, queries in requests:
+            first = self.client.get(url, params)
+            with self.assertNumQueries(queries):
+                second = self.client.get(url, params)
+            self.assertEqual(first.json(), second.json())
+
+    def test_task_writes_invalidate_the_assignee(self):
+        url = reverse('taskboard')
+        self.client.get(url, {'assignee': self.agent.id})
+        Task.objects.filter(pk=self.task.pk).first().mark_as_completed()
+        response = self.client.get(url, {'assignee': self.agent.id})
+        self.assertEqual([t['id'] for t in response.data['completed']], [self.task.id])
+
+    def test_submission_and_document_writes_invalidate(self):
+        url = reverse('user-tasks', args=[self.agent.username])
+        self.client.get(url)
+        TaskDocument.objects.filter(submission__task=self.task).delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]['submissions'][0]['documents'], [])
+
+    def test_reassignment_invalidates_previous_assignee(self):
+        other = make_agent('2')
+        self.client.get(reverse('taskboard'), {'assignee': self.agent.id})
+        self.task.assignee = other
+        self.task.save()
+        response = self.client.get(reverse('taskboard'), {'assignee': self.agent.id})
+        self.assertEqual(response.data['due_today'] + response.data['due_this_week'], [])
+
+    def test_sweep_invalidates_affected_assignees(self):
+        Task.objects.filter(pk=self.task.pk).update(due_date=timezone.now() - timedelta(hours=1))
+        cache.clear()
+        self.client.get(reverse('calendar'), {'assignee': self.agent.id})
+        Task.sweep_overdue()
+        response = self.client.get(reverse('calendar'), {'assignee': self.agent.id})
+        self.assertEqual(list(response.data.values())[0][0]['status'], 'overdue')
+
+
+class OTPFlowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+
+    def request_otp(self, phone_number=None, **extra):
+        return self.client.post(reverse('request-otp'), {'phone_number': phone_number or self.agent.phone_number},
+                                format='json', **extra)
+
+    def verify_otp(self, otp):
+        return self.client.post(reverse('verify-otp'), {'phone_number': self.agent.phone_number, 'otp': otp},
+                                format='json')
+
+    def test_otp_is_stored_hashed_outside_the_user_row(self):
+        otp = self.request_otp().data['otp']
+        record = PhoneOTP.objects.get(phone_number=self.agent.phone_number)
+        self.assertNotIn(otp, record.code_hash)
+        response = self.verify_otp(otp)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['user']['is_verified'])
+        self.assertTrue(UserTable.objects.get(pk=self.agent.pk).is_verified)
+        self.assertEqual(PhoneOTP.objects.get().code_hash, '')
+        self.assertEqual(self.verify_otp(otp).status_code, 400)
+
+    def test_expired_otp_is_rejected(self):
+        otp = self.request_otp().data['otp']
+        PhoneOTP.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.verify_otp(otp).status_code, 400)
+
+    def test_wrong_guesses_lock_the_code(self):
+        otp = self.request_otp().data['otp']
+        wrong = '000000' if otp != '000000' else '111111'
+        for _ in range(5):
+            self.assertEqual(self.verify_otp(wrong).status_code, 400)
+        self.assertEqual(self.verify_otp(otp).status_code, 400)
+
+    def test_requests_are_rate_limited_per_phone(self):
+        for _ in range(5):
+            self.assertEqual(self.request_otp().status_code, 200)
+        self.assertEqual(self.request_otp().status_code, 429)
+        other = make_agent('2')
+        self.assertEqual(self.request_otp(other.phone_number).status_code, 200)
+
+    def test_phone_limit_is_kept_in_the_database(self):
+        # Another worker with its own cache sees the same count
+        for _ in range(5):
+            self.assertEqual(self.request_otp().status_code, 200)
+            cache.clear()
+        self.assertEqual(self.request_otp().status_code, 429)
+        self.assertEqual(PhoneOTP.objects.get().issued, 5)
+        PhoneOTP.objects.update(window_started=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.request_otp().status_code, 200)
+        self.assertEqual(PhoneOTP.objects.get().issued, 1)
+
+    def test_logging_in_does_not_reset_the_phone_limit(self):
+        for _ in range(5):
+            otp = self.request_otp().data['otp']
+        self.assertEqual(self.verify_otp(otp).status_code, 200)
+        self.assertEqual(self.request_otp().status_code, 429)
+
+    def test_requests_are_rate_limited_per_ip(self):
+        phones = [make_agent(str(i)).phone_number for i in range(3, 10)]
+        with mock.patch.object(OTPIPRateThrottle, 'THROTTLE_RATES', {'otp_ip': '6/min'}):
+            codes = [self.request_otp(phone).status_code for phone in phones]
+        self.assertEqual(codes, [200] * 6 + [429])
+
+    def test_ip_limit_ignores_a_spoofed_forwarded_for(self):
+        phones = [make_agent(str(i)).phone_number for i in range(3, 6)]
+        with mock.patch.object(OTPIPRateThrottle, 'THROTTLE_RATES', {'otp_ip': '2/min'}):
+            codes = [self.request_otp(phone, HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+                     for i, phone in enumerate(phones)]
+        self.assertEqual(codes, [200, 200, 429])
+
+    def test_request_and_verify_use_minimal_queries(self):
+        # A phone's first code inserts its row; every later one is a single UPDATE
+        otp = self.request_otp().data['otp']
+        with self.assertNumQueries(3):  # user lookup, OTP consume, is_verified update
+            self.assertEqual(self.verify_otp(otp).status_code, 200)
+        with self.assertNumQueries(2):  # user lookup, OTP update
+            otp = self.request_otp().data['otp']
+        with CaptureQueriesContext(connection) as queries:
+            self.verify_otp(otp)
+        self.assertEqual(len(queries), 2)  # already verified, so the user row is not written
+        self.assertNotIn('aadhaar_file', queries.captured_queries[0]['sql'])
+
+    def test_benchmark_reports_query_and_write_counts(self):
+        out = StringIO()
+        call_command('benchmark_otp', self.agent.phone_number, '--iterations', '2', stdout=out)
+        self.assertIn('request: 2.0 queries, 1.0 writes', out.getvalue())
+        self.assertIn('verify: 2.5 queries, 1.5 writes', out.getvalue())
+        self.assertFalse(UserTable.objects.get(pk=self.agent.pk).is_verified)
+        self.assertFalse(PhoneOTP.objects.exists())
+
+
+class ChunkedDocumentUploadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        overrides = override_settings(
+            MEDIA_ROOT=self.tmp + '/media',
+            DOCUMENT_UPLOAD_STAGING_DIR=self.tmp + '/staging',
+            DOCUMENT_UPLOAD_MAX_CHUNK_SIZE=1024,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.agent = make_agent()
+        self.content = bytes(range(256)) * 10  # 2560 bytes, three chunks
+
+    def start(self, **extra):
+        payload = {'field': 'pan_file', 'filename': 'pan card.pdf', 'size': len(self.content),
+                   'sha256': hashlib.sha256(self.content).hexdigest()}
+        payload.update(extra)
+        response = self.client.post(reverse('document-upload-session', args=[self.agent.username]), payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def put(self, upload, start, end):
+        return self.client.generic(
+            'PUT', upload['upload_url'], self.content[start:end + 1], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.content)}',
+        )
+
+    def commit(self, upload):
+        return self.client.post(reverse('document-upload-commit', args=[upload['id']]))
+
+    def test_chunks_are_assembled_and_committed(self):
+        upload = self.start()
+        for start in range(0, len(self.content), 1024):
+            response = self.put(upload, start, min(start + 1023, len(self.content) - 1))
+            self.assertEqual(response.status_code, 200)
+        # The digest verified by the commit is handed to the storage rather than computed again
+        with CaptureQueriesContext(connection) as queries, mock.patch('core.storage.hashlib') as storage_hashlib:
+            response = self.commit(upload)
+        self.assertEqual(response.status_code, 201, response.data)
+        storage_hashlib.sha256.assert_not_called()
+        user_writes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "users_usertable"')]
+        self.assertEqual(len(user_writes), 1)
+        self.assertNotIn('aadhaar_file', user_writes[0])
+        user = UserTable.objects.get(pk=self.agent.pk)
+        with user.pan_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.content)
+        self.assertFalse(DocumentUpload.objects.exists())
+
+    def test_out_of_order_ranges_are_rejected_and_resumable(self):
+        upload = self.start()
+        self.put(upload, 0, 1023)
+        self.assertEqual(self.put(upload, 2048, 2559).status_code, 409)
+        status_response = self.client.get(upload['upload_url'])
+        self.assertEqual(status_response.data['received_bytes'], 1024)
+        self.assertEqual(self.commit(upload).status_code, 409)
+
+    def test_checksum_is_required(self):
+        payload = {'field': 'pan_file', 'filename': 'pan.pdf', 'size': len(self.content)}
+        response = self.client.post(reverse('document-upload-session', args=[self.agent.username]), payload,
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sha256', response.data)
+
+    def test_a_range_appended_while_the_body_was_read_is_refused(self):
+        upload = self.start()
+        body = mock.Mock(read=mock.Mock(side_effect=[self.content[:1024], b'']))
+
+        def competing_read(size):
+            # Another request for the same range lands while this one is still receiving
+            DocumentUpload.objects.filter(pk=upload['id']).update(received_bytes=1024)
+            return body.read(size)
+        with self.assertRaises(UploadError) as raised:
+            append_chunk(upload['id'], f'bytes 0-1023/{len(self.content)}', mock.Mock(read=competing_read))
+        self.assertEqual(raised.exception.status_code, 409)
+
+    def test_oversized_chunks_are_refused(self):
+        upload = self.start()
+        self.assertEqual(self.put(upload, 0, 2047).status_code, 413)
+
+    def test_checksum_mismatch_restarts_the_upload(self):
+        upload = self.start(sha256='0' * 64)
+        for start in range(0, len(self.content), 1024):
+            self.put(upload, start, min(start + 1023, len(self.content) - 1))
+        self.assertEqual(self.commit(upload).status_code, 400)
+        self.assertEqual(DocumentUpload.objects.get().received_bytes, 0)
+        self.assertFalse(UserTable.objects.get(pk=self.agent.pk).pan_file)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        overrides = override_settings(MEDIA_ROOT=self.tmp)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.agents = [make_agent('1'), make_agent('2')]
+
+    def upload(self, agent, content=b'%PDF-1.4 same scan'):
+        response = self.client.post(
+            reverse('user-document-upload', args=[agent.username]),
+            {'aadhaar_file': SimpleUploadedFile('aadhar_card.pdf', content)}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 201)
+        return UserTable.objects.get(pk=agent.pk).aadhaar_file.name
+
+    def blob_files(self):
+        blobs = os.path.join(self.tmp, 'blobs')
+        staging = os.path.join(blobs, 'tmp')
+        return sorted(name for directory, _, files in os.walk(blobs) if directory != staging for name in files)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload(self.agents[0])
+        second = self.upload(self.agents[1])
+        again = self.upload(self.agents[0])
+        self.assertEqual(first, second)
+        self.assertEqual(first, again)
+        self.assertEqual(first, 'blobs/' + hashlib.sha256(b'%PDF-1.4 same scan').hexdigest()[:2] + first[8:])
+        self.assertTrue(first.endswith('.pdf'))
+        self.assertEqual(len(self.blob_files()), 1)
+
+    def test_gc_removes_only_unreferenced_blobs(self):
+        shared = self.upload(self.agents[0])
+        self.upload(self.agents[1])
+        orphan = self.upload(self.agents[0], b'%PDF-1.4 replaced scan')
+        self.upload(self.agents[0], b'%PDF-1.4 final scan')
+        self.assertEqual(len(self.blob_files()), 3)
+
+        out = StringIO()
+        call_command('gc_blobs', '--grace', '0', stdout=out)
+        self.assertIn('Deleted 1 orphaned blob(s)', out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, shared)))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, orphan)))
+        self.assertEqual(len(self.blob_files()), 2)
+
+    def test_deduplicated_saves_restart_the_grace_period(self):
+        name = self.upload(self.agents[0])
+        blob = os.path.join(self.tmp, name)
+        os.utime(blob, (0, 0))
+        self.upload(self.agents[1])
+        self.assertGreater(os.path.getmtime(blob), time.time() - 60)
+
+    def test_blob_names_must_fit_the_field(self):
+        storage = ContentAddressedStorage(location=self.tmp)
+        self.assertEqual(storage.get_available_name('documents/pan/scan.pdf', max_length=100), 'documents/pan/scan.pdf')
+        with self.assertRaises(SuspiciousFileOperation):
+            storage.get_available_name('documents/pan/scan.' + 'x' * 40, max_length=100)
+
+    def test_gc_keeps_recent_orphans(self):
+        self.upload(self.agents[0])
+        UserTable.objects.update(aadhaar_file=None)
+        out = StringIO()
+        call_command('gc_blobs', stdout=out)
+        self.assertIn('Deleted 0 orphaned blob(s)', out.getvalue())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.agent = make_agent()
+        self.tasks = make_tasks(self.agent, 3, days=3, with_documents=0)
+
+    def assertRevalidates(self, url, params):
+        response = self.client.get(url, params)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        with self.assertNumQueries(1):
+            # Only the validator query; no rows are loaded or serialized
+            repeat = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(repeat['ETag'], etag)
+        return etag
+
+    def test_task_list_revalidates_until_a_task_changes(self):
+        url, params = reverse('task-list'), {'assignee': self.agent.id, 'omit': 'time_remaining'}
+        etag = self.assertRevalidates(url, params)
+        Task.objects.filter(pk=self.tasks[0].pk).update(title='Renamed', updated_at=timezone.now())
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        Task.objects.filter(pk=self.tasks[1].pk).delete()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_task_detail_sends_last_modified(self):
+        url = reverse('task-detail', args=[self.tasks[0].pk])
+        params = {'omit': 'time_remaining'}
+        response = self.client.get(url, params)
+        self.assertIn('Last-Modified', response)
+        repeat = self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[0])).status_code, 404)
+
+    def test_time_remaining_changes_the_etag_each_minute(self):
+        url, params = reverse('task-list'), {'assignee': self.agent.id}
+        etag = self.client.get(url, params)['ETag']
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(minutes=2)):
+            self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_taskboard_revalidates_until_the_assignee_writes(self):
+        url, params = reverse('taskboard'), {'assignee': self.agent.id, 'omit': 'time_remaining'}
+        etag = self.assertRevalidates(url, params)
+        self.client.patch(reverse('task-detail', args=[self.tasks[0].pk]), {'title': 'Renamed'}, format='json')
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_writes_from_other_processes_change_the_etag(self):
+        # A queryset update, as the overdue sweeper in another container runs, never bumps this
+        # process's cache version; the validators come from the database instead
+        doomed = make_tasks(self.agent, 3, days=3, with_documents=0)
+        for task, (url, params) in zip(doomed, [(reverse('taskboard'), {'assignee': self.agent.id, 'fields': 'id,status'}),
+                            (reverse('calendar'), {'assignee': self.agent.id}),
+                            (reverse('user-tasks', args=[self.agent.username]), {'omit': 'time_remaining'})]):
+            with mock.patch('users.models.invalidate_assignees'), mock.patch('users.signals.invalidate_assignees'):
+                etag = self.client.get(url, params)['ETag']
+                Task.objects.filter(pk=self.tasks[0].pk).update(status='overdue', updated_at=timezone.now())
+                response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200, url)
+                task.delete()
+                self.assertNotEqual(self.client.get(url, params)['ETag'], response['ETag'], url)
@@ -0,0 +1,15 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class OTPIPRateThrottle(SimpleRateThrottle):
+    """
+    Limits OTP requests and verification attempts per client IP.
+
+    Counted in the default cache, so only shared between workers when
+    REDIS_URL is set. The per-phone limit does not depend on it: it is kept
+    on the PhoneOTP row (see PhoneOTP.issue).
+    """
+    scope = 'otp_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from .models import DocumentUpload, UserTable
+
+READ_BLOCK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StagedFile(File):
+    """
+    A fully assembled staging file.
+
+    Exposing temporary_file_path() lets FileSystemStorage move the file into
+    place instead of copying it, as it does for Django's own temporary uploads.
+    `sha256` is the digest already verified, so the storage need not hash it again.
+    """
+    def __init__(self, file, sha256):
+        super().__init__(file)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def max_chunk_size():
+    return getattr(settings, 'DOCUMENT_UPLOAD_MAX_CHUNK_SIZE', 5 * 1024 * 1024)
+
+
+def parse_content_range(header, upload):
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError("A 'Content-Range: bytes start-end/total' header is required")
+    start, end, total = (int(value) for value in match.groups())
+    if total != upload.size or end < start or end >= total:
+        raise UploadError("Content-Range does not match the upload size")
+    if end - start + 1 > max_chunk_size():
+        raise UploadError(f"Chunks may be at most {max_chunk_size()} bytes", status_code=413)
+    return start, end
+
+
+def check_offset(upload, start):
+    if start != upload.received_bytes:
+        raise UploadError(f"Expected a range starting at byte {upload.received_bytes}", status_code=409)
+
+
+def append_chunk(upload_id, content_range, stream):
+    """
+    Write one byte range into the staging file and return the updated upload.
+
+    Ranges must continue exactly where the last accepted one ended; anything
+    else gets a 409 and the client resumes from received_bytes. Whatever part
+    of the body actually arrived is kept, so a dropped connection loses nothing.
+
+    The body is read from the client into a spool file before the upload row
+    is locked, so a slow client holds neither a row lock nor a transaction
+    (and its pooled connection) while it sends.
+    """
+    upload = DocumentUpload.objects.get(pk=upload_id)
+    start, end = parse_content_range(content_range, upload)
+    check_offset(upload, start)
+
+    path = upload.staging_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile(dir=path.parent) as spool:
+        remaining = end - start + 1
+        while remaining:
+            block = stream.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            spool.write(block)
+            remaining -= len(block)
+        spool.seek(0)
+
+        with transaction.atomic():
+            # Another request may have appended this range while the body was read
+            upload = DocumentUpload.objects.select_for_update().get(pk=upload_id)
+            check_offset(upload, start)
+            with open(path, 'r+b' if path.exists() else 'wb') as staged:
+                staged.seek(start)
+                shutil.copyfileobj(spool, staged, READ_BLOCK_SIZE)
+                staged.truncate()
+                upload.received_bytes = staged.tell()
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+    return upload
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as staged:
+        for block in iter(lambda: staged.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def discard(upload):
+    try:
+        os.remove(upload.staging_path)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def check_complete(upload):
+    if upload.received_bytes != upload.size:
+        raise UploadError(f"Upload incomplete: {upload.received_bytes} of {upload.size} bytes received", status_code=409)
+
+
+def commit_upload(upload_id):
+    """
+    Verify a complete upload against the digest given when it was started,
+    move it into the user's document field and write that single column of
+    the user row.
+    """
+    upload = DocumentUpload.objects.get(pk=upload_id)
+    check_complete(upload)
+    # A complete upload accepts no more ranges, so the file can be hashed before taking the lock
+    checksum = file_sha256(upload.staging_path)
+    with transaction.atomic():
+        upload = DocumentUpload.objects.select_for_update().get(pk=upload_id)
+        check_complete(upload)
+        if checksum != upload.sha256.lower():
+            # Start over from byte 0 rather than keep bytes that are known to be bad
+            os.remove(upload.staging_path)
+            upload.received_bytes = 0
+            upload.save(update_fields=['received_bytes', 'updated_at'])
+            checksum = None
+        else:
+            user = UserTable.objects.only('id', 'username', upload.field).get(pk=upload.user_id)
+            with open(upload.staging_path, 'rb') as staged:
+                getattr(user, upload.field).save(upload.filename, StagedFile(staged, checksum), save=False)
+            user.save(update_fields=[upload.field])
+            discard(upload)
+    if checksum is None:
+        raise UploadError("Checksum mismatch, upload the file again from byte 0")
+    return user, upload.field, checksum
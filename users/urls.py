@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserRegistrationView, UserMetadataUpdateView, DocumentUploadView,
+    DocumentUploadSessionView, DocumentUploadChunkView, DocumentUploadCommitView,
     OTPRequestView, OTPVerifyView,
     TaskViewSet, UserTasksView, TaskSubmissionView, TaskboardView, TaskCalendarView
 )
@@ -14,6 +15,9 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user-register'),
     path('update-metadata/<str:username>/', UserMetadataUpdateView.as_view(), name='user-metadata-update'),
     path('upload-documents/<str:username>/', DocumentUploadView.as_view(), name='user-document-upload'),
+    path('upload-documents/<str:username>/sessions/', DocumentUploadSessionView.as_view(), name='document-upload-session'),
+    path('uploads/<uuid:upload_id>/', DocumentUploadChunkView.as_view(), name='document-upload-chunk'),
+    path('uploads/<uuid:upload_id>/commit/', DocumentUploadCommitView.as_view(), name='document-upload-commit'),
     path('request-otp/', OTPRequestView.as_view(), name='request-otp'),
     path('verify-otp/', OTPVerifyView.as_view(), name='verify-otp'),
     # Task-related endpoints
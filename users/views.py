@@ -1,15 +1,18 @@
-from django.shortcuts import render
+from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.exceptions import NotFound, ParseError, Throttled
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
 from .serializers import (
     UserRegistrationSerializer, MetadataSerializer, DocumentUploadSerializer,
-    OTPRequestSerializer, OTPVerifySerializer
+    DocumentUploadSessionSerializer, OTPRequestSerializer, OTPVerifySerializer
 )
-from .models import UserTable
+from .models import UserTable, DocumentUpload, DOCUMENT_FIELDS
+from .uploads import UploadError, append_chunk, commit_upload
+from .throttling import OTPIPRateThrottle
 import logging
 
 # Set up logger
@@ -96,32 +99,22 @@ class DocumentUploadView(generics.GenericAPIView):
     
     def post(self, request, *args, **kwargs):
         user = self.get_object()
+        uploaded = [field for field in DOCUMENT_FIELDS if field in request.FILES]
         
         # Log request information
-        logger.info(f"Document upload request for user {user.username}")
-        logger.info(f"Request data: {request.data}")
-        logger.info(f"Files: {request.FILES}")
+        logger.info(f"Document upload request for user {user.username}: {', '.join(uploaded) or 'no files'}")
         
         try:
             # Process each file individually to avoid issues
-            if 'aadhaar_file' in request.FILES:
-                user.aadhaar_file = request.FILES['aadhaar_file']
+            for field in uploaded:
+                setattr(user, field, request.FILES[field])
             
-            if 'pan_file' in request.FILES:
-                user.pan_file = request.FILES['pan_file']
-                
-            if 'police_verification' in request.FILES:
-                user.police_verification = request.FILES['police_verification']
-                
-            if 'empanelment_letter' in request.FILES:
-                user.empanelment_letter = request.FILES['empanelment_letter']
-            
-            # Save the user object with the uploaded files
-            user.save()
+            # Save only the document columns that changed
+            user.save(update_fields=uploaded)
             
             # Prepare response with file URLs
             document_urls = {}
-            for field in ['aadhaar_file', 'pan_file', 'police_verification', 'empanelment_letter']:
+            for field in DOCUMENT_FIELDS:
                 file = getattr(user, field, None)
                 if file and file.name:
                     document_urls[field] = request.build_absolute_uri(file.url)
@@ -139,33 +132,88 @@ class DocumentUploadView(generics.GenericAPIView):
         return Response({"error": "No files were uploaded"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class DocumentUploadSessionView(generics.CreateAPIView):
+    """
+    Start a resumable upload of one document. The client then PUTs byte ranges
+    to the returned upload_url and finally POSTs to its commit/ endpoint.
+    """
+    serializer_class = DocumentUploadSessionSerializer
+    
+    def post(self, request, *args, **kwargs):
+        username = self.kwargs.get('username')
+        user = UserTable.objects.only('id').filter(username=username).first()
+        if user is None:
+            raise NotFound(f"User with username {username} not found")
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            upload = serializer.save(user=user)
+            data = dict(serializer.data)
+            data['upload_url'] = request.build_absolute_uri(reverse('document-upload-chunk', args=[upload.id]))
+            return Response(data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DocumentUploadChunkView(APIView):
+    """
+    GET reports how many bytes have been received so an interrupted upload can
+    resume; PUT appends the byte range named by the Content-Range header.
+    """
+    def get(self, request, upload_id):
+        upload = DocumentUpload.objects.filter(pk=upload_id).first()
+        if upload is None:
+            raise NotFound("Upload not found")
+        return Response(DocumentUploadSessionSerializer(upload).data)
+    
+    def put(self, request, upload_id):
+        try:
+            upload = append_chunk(upload_id, request.headers.get('Content-Range'), request.stream)
+        except DocumentUpload.DoesNotExist:
+            raise NotFound("Upload not found")
+        except UploadError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response({"id": upload.id, "received_bytes": upload.received_bytes, "size": upload.size})
+
+
+class DocumentUploadCommitView(APIView):
+    """Verify a completed upload and attach it to the user"""
+    def post(self, request, upload_id):
+        try:
+            user, field, checksum = commit_upload(upload_id)
+        except DocumentUpload.DoesNotExist:
+            raise NotFound("Upload not found")
+        except UploadError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response({
+            "message": "Document uploaded successfully",
+            "username": user.username,
+            "documents": {field: request.build_absolute_uri(getattr(user, field).url)},
+            "sha256": checksum
+        }, status=status.HTTP_201_CREATED)
+
+
 class OTPRequestView(APIView):
     """
     API endpoint for requesting an OTP using phone number
     """
     serializer_class = OTPRequestSerializer
+    # The per-phone limit is kept on the PhoneOTP row, see PhoneOTP.issue
+    throttle_classes = [OTPIPRateThrottle]
     
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             phone_number = serializer.validated_data['phone_number']
+            otp = serializer.validated_data['user'].generate_otp()
+            if otp is None:
+                raise Throttled(detail="Too many OTP requests for this phone number.")
             
-            try:
-                user = UserTable.objects.get(phone_number=phone_number)
-                otp = user.generate_otp()
-                
-                # In a real-world scenario, you would send this OTP via SMS
-                # For this example, we'll just return it in the response
-                return Response({
-                    "message": "OTP sent successfully",
-                    "phone_number": phone_number,
-                    "otp": otp  # In production, remove this line and send OTP via SMS
-                })
-            except UserTable.DoesNotExist:
-                return Response(
-                    {"error": "No user found with this phone number"}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            # In a real-world scenario, you would send this OTP via SMS
+            # For this example, we'll just return it in the response
+            return Response({
+                "message": "OTP sent successfully",
+                "phone_number": phone_number,
+                "otp": otp  # In production, remove this line and send OTP via SMS
+            })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -175,40 +223,33 @@ class OTPVerifyView(APIView):
     API endpoint for verifying OTP and logging in
     """
     serializer_class = OTPVerifySerializer
+    throttle_classes = [OTPIPRateThrottle]
     
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            phone_number = serializer.validated_data['phone_number']
             otp = serializer.validated_data['otp']
+            user = serializer.validated_data['user']
             
-            try:
-                user = UserTable.objects.get(phone_number=phone_number)
-                if user.verify_otp(otp):
-                    # OTP verified successfully, return user details
-                    return Response({
-                        "message": "OTP verified successfully",
-                        "user": {
-                            "id": user.id,
-                            "username": user.username,
-                            "first_name": user.first_name,
-                            "last_name": user.last_name,
-                            "type": user.type,
-                            "phone_number": user.phone_number,
-                            "email": user.email,
-                            "is_verified": user.is_verified
-                        }
-                    })
-                else:
-                    return Response(
-                        {"error": "Invalid or expired OTP"}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            except UserTable.DoesNotExist:
-                return Response(
-                    {"error": "No user found with this phone number"}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            if user.verify_otp(otp):
+                # OTP verified successfully, return user details
+                return Response({
+                    "message": "OTP verified successfully",
+                    "user": {
+                        "id": user.id,
+                        "username": user.username,
+                        "first_name": user.first_name,
+                        "last_name": user.last_name,
+                        "type": user.type,
+                        "phone_number": user.phone_number,
+                        "email": user.email,
+                        "is_verified": user.is_verified
+                    }
+                })
+            return Response(
+                {"error": "Invalid or expired OTP"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -217,21 +258,54 @@ from rest_framework import viewsets, generics, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.utils import timezone
-from datetime import timedelta
+from django.utils.functional import cached_property
 from django.db.models import Q
+import asyncio
 from .models import Task, TaskSubmission, TaskDocument, UserTable
-from .serializers import TaskSerializer, TaskSubmissionSerializer, TaskDocumentSerializer, TaskCalendarSerializer
+from .serializers import (
+    TaskSerializer, TaskSubmissionSerializer, TaskDocumentSerializer, TaskCalendarSerializer,
+    TaskSlimSerializer, TaskBulkCreateSerializer
+)
+from rest_framework.decorators import action
+from .pagination import TaskCursorPagination
+from core.async_views import AsyncAPIView
+from core.conditional import ConditionalGetMixin, make_etag, not_modified, representation_key, set_validators
+from core.fieldsets import parse_names, select_fields
+from .task_calendar import group_by_day, month_range, summarize, summary_rows, task_rows
+from .taskboard import DUE_RANKS, TimeWindow, abuild_taskboard, alist, annotate_due_rank
+from . import cache as task_cache
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     queryset = Task.objects.all()
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description', 'tags']
-    ordering_fields = ['due_date', 'priority', 'created_date', 'status']
-    ordering = ['due_date']
+    ordering_fields = ['due_date', 'priority', 'created_date', 'status', 'due_rank']
+    ordering = ['due_date', 'id']
+    pagination_class = TaskCursorPagination
+    @cached_property
+    def time_window(self):
+        return TimeWindow()
+    def is_slim(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'slim'
+    def get_serializer_class(self):
+        if self.is_slim():
+            return TaskSlimSerializer
+        return TaskSerializer
+    def ordering_columns(self):
+        """Columns the cursor paginator reads from the last row, which .only() must keep"""
+        requested = parse_names(self.request.query_params.get('ordering'))
+        return {'due_date', *(name.lstrip('-') for name in requested if name.lstrip('-') in self.ordering_fields)} - {'due_rank'}
     def get_queryset(self):
         queryset = Task.objects.all()
+        selected = None
+        if self.action in ('list', 'retrieve'):
+            # ?fields= / ?omit= narrow the SELECT as well as the output
+            queryset, selected = self.get_serializer_class().project(
+                queryset, self.request.query_params, always=self.ordering_columns()
+            )
+        if not self.is_slim() and (selected is None or 'submissions' in selected):
+            queryset = queryset.prefetch_related('submissions__documents')
         assignee_id = self.request.query_params.get('assignee')
         status = self.request.query_params.get('status')
         priority = self.request.query_params.get('priority')
@@ -242,25 +316,60 @@ class TaskViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(status=status)
         if priority:
             queryset = queryset.filter(priority=priority)
-        if due_category:
-            now = timezone.now()
-            today_end = now.replace(hour=23, minute=59, second=59)
-            week_end = now + timedelta(days=(6 - now.weekday()))
-            week_end = week_end.replace(hour=23, minute=59, second=59)
-            if due_category == 'due_today':
-                queryset = queryset.filter(due_date__lte=today_end)
-            elif due_category == 'due_this_week':
-                queryset = queryset.filter(due_date__gt=today_end, due_date__lte=week_end)
-            elif due_category == 'upcoming':
-                queryset = queryset.filter(due_date__gt=week_end)
+        if self.action == 'list':
+            # Ranked in the database so ?due_category= and ?ordering=due_rank need no Python pass
+            queryset = annotate_due_rank(queryset, self.time_window)
+            if due_category in DUE_RANKS:
+                queryset = queryset.filter(due_rank=DUE_RANKS[due_category])
         return queryset
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['time_window'] = self.time_window
+        return context
+    def etag_parts(self):
+        fields = select_fields(list(self.get_serializer_class()().fields), self.request.query_params)
+        return (self.time_window.validity(fields),)
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Create many tasks at once, either as a list or one template fanned out to several assignees"""
+        serializer = TaskBulkCreateSerializer(data=request.data)
+        if serializer.is_valid():
+            tasks = serializer.save()
+            return Response({
+                "created": len(tasks),
+                "tasks": TaskSlimSerializer(tasks, many=True).data
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class UserTasksView(generics.ListAPIView):
     serializer_class = TaskSerializer
-    def get_queryset(self):
+    def get_user_id(self):
         username = self.kwargs.get('username')
-        user = get_object_or_404(UserTable, username=username)
-        return Task.objects.filter(assignee=user).order_by('due_date')
+        return get_object_or_404(UserTable.objects.only('id'), username=username).id
+    def tasks_for(self, user_id):
+        queryset, selected = TaskSerializer.project(Task.objects.filter(assignee_id=user_id), self.request.query_params)
+        if selected is None or 'submissions' in selected:
+            queryset = queryset.prefetch_related('submissions__documents')
+        return queryset.order_by('due_date')
+    def get_queryset(self):
+        return self.tasks_for(self.get_user_id())
+    def list(self, request, *args, **kwargs):
+        user_id = self.get_user_id()
+        key = task_cache.response_key('user-tasks', user_id, request.query_params)
+        window = TimeWindow()
+        # The cache key carries the assignee's database validators and the params
+        etag = make_etag(representation_key(request), key, window.validity(
+            select_fields(list(TaskSerializer().fields), request.query_params)
+        ))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = task_cache.get_response(key)
+        if data is None:
+            context = {**self.get_serializer_context(), 'time_window': window}
+            data = self.get_serializer(self.tasks_for(user_id), many=True, context=context).data
+            task_cache.set_response(key, data)
+        return set_validators(Response(data), etag)
 
 class TaskSubmissionView(generics.CreateAPIView):
     serializer_class = TaskSubmissionSerializer
@@ -275,59 +384,65 @@ class TaskSubmissionView(generics.CreateAPIView):
             return Response({"error": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
         return super().post(request, *args, **kwargs)
 
-class TaskboardView(APIView):
-    def get(self, request):
+class TaskboardView(AsyncAPIView):
+    async def get(self, request):
         assignee_id = request.query_params.get('assignee')
         if not assignee_id:
             return Response({"error": "Assignee parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            user = UserTable.objects.get(id=assignee_id)
-        except UserTable.DoesNotExist:
-            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-        now = timezone.now()
-        today_end = now.replace(hour=23, minute=59, second=59)
-        week_end = now + timedelta(days=(6 - now.weekday()))
-        week_end = week_end.replace(hour=23, minute=59, second=59)
-        tasks_due_today = Task.objects.filter(assignee=user, due_date__lte=today_end, status__in=['pending', 'in_progress', 'overdue']).order_by('due_date')
-        tasks_due_this_week = Task.objects.filter(assignee=user, due_date__gt=today_end, due_date__lte=week_end, status__in=['pending', 'in_progress']).order_by('due_date')
-        upcoming_tasks = Task.objects.filter(assignee=user, due_date__gt=week_end, status__in=['pending', 'in_progress']).order_by('due_date')
-        completed_tasks = Task.objects.filter(assignee=user, status='completed').order_by('-completed_date')[:10]
-        serializer_today = TaskSerializer(tasks_due_today, many=True)
-        serializer_this_week = TaskSerializer(tasks_due_this_week, many=True)
-        serializer_upcoming = TaskSerializer(upcoming_tasks, many=True)
-        serializer_completed = TaskSerializer(completed_tasks, many=True)
-        return Response({
-            "due_today": serializer_today.data,
-            "due_this_week": serializer_this_week.data,
-            "upcoming": serializer_upcoming.data,
-            "completed": serializer_completed.data
-        })
+        key = await task_cache.aresponse_key('taskboard', assignee_id, request.query_params)
+        window = TimeWindow()
+        selected, columns = TaskSerializer.projection(request.query_params)
+        etag = None
+        if key is not None:
+            etag = make_etag(representation_key(request), key, window.validity(selected))
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+        data = await task_cache.aget_response(key)
+        if data is None:
+            user_exists, board = await asyncio.gather(
+                UserTable.objects.filter(id=assignee_id).aexists(),
+                abuild_taskboard(assignee_id, window, columns, prefetch=selected is None or 'submissions' in selected),
+            )
+            if not user_exists:
+                return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+            context = {'time_window': window, 'query_params': request.query_params}
+            data = {
+                bucket: TaskSerializer(tasks, many=True, context=context).data
+                for bucket, tasks in board.items()
+            }
+            await task_cache.aset_response(key, data)
+        return set_validators(Response(data), etag) if etag else Response(data)
 
-class TaskCalendarView(APIView):
-    def get(self, request):
+class TaskCalendarView(AsyncAPIView):
+    async def get(self, request):
         assignee_id = request.query_params.get('assignee')
         year = request.query_params.get('year')
         month = request.query_params.get('month')
         if not assignee_id:
             return Response({"error": "Assignee parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            user = UserTable.objects.get(id=assignee_id)
-        except UserTable.DoesNotExist:
+        key = await task_cache.aresponse_key('calendar', assignee_id, request.query_params)
+        etag = make_etag(representation_key(request), key) if key is not None else None
+        if etag:
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+        calendar_data = await task_cache.aget_response(key)
+        if calendar_data is not None:
+            return set_validators(Response(calendar_data), etag)
+        if not await UserTable.objects.filter(id=assignee_id).aexists():
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
-        tasks_query = Task.objects.filter(assignee=user)
+        bounds = None
         if year and month:
             try:
-                year = int(year)
-                month = int(month)
-                tasks_query = tasks_query.filter(due_date__year=year, due_date__month=month)
+                bounds = month_range(int(year), int(month))
             except ValueError:
                 return Response({"error": "Invalid year or month format"}, status=status.HTTP_400_BAD_REQUEST)
-        tasks = tasks_query.order_by('due_date')
-        serializer = TaskCalendarSerializer(tasks, many=True)
-        calendar_data = {}
-        for task in serializer.data:
-            due_date = task['due_date'].split('T')[0]
-            if due_date not in calendar_data:
-                calendar_data[due_date] = []
-            calendar_data[due_date].append(task)
-        return Response(calendar_data)
+        if request.query_params.get('summary') in ('1', 'true'):
+            # Per-day counts by status and priority only, aggregated by the database
+            calendar_data = summarize(await alist(summary_rows(assignee_id, bounds)))
+        else:
+            rows = await alist(task_rows(assignee_id, bounds))
+            calendar_data = group_by_day(rows, TaskCalendarSerializer(rows, many=True).data)
+        await task_cache.aset_response(key, calendar_data)
+        return set_validators(Response(calendar_data), etag) if etag else Response(calendar_data)